@@ -0,0 +1,149 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+from itertools import combinations
+from multiprocessing import get_context
+
+#####################################
+# Modo batch (sem ask_input)
+#
+# Um job é (gráfico do select_chart, sinal do animation_type, subconjunto de b_0..b_3 do opt).
+# Todos os jobs: 3 funções x 2 sinais x 15 subconjuntos = 90 animações.
+# Cada saida tem um arquivo .key ao lado com o hash das entradas (cache.py), então
+# jobs cujo arquivo já está atualizado são pulados.
+#
+# Uso: python batch.py --all --out saida --workers 8
+#      python batch.py --job tg:1:1,3 --job sen:0:2
+#####################################
+
+Job = namedtuple('Job', 'chart_opt animation_type opt')
+
+CHART_IDS = {'sen': 1, 'cos': 2, 'tg': 3}
+SIGNALS = {0: 'negativo', 1: 'positivo'}
+PARAMS = [1, 2, 3, 4]   # b_0, b_1, b_2, b_3 (mesmos valores do menu do ask_input)
+
+
+def all_jobs():
+    """
+    Matriz completa de jobs (gráfico x sinal x subconjunto não vazio de b_0..b_3).
+    """
+    subsets = [list(c) for size in range(1, len(PARAMS) + 1) for c in combinations(PARAMS, size)]
+    return [Job(chart_opt, animation_type, opt)
+            for chart_opt in sorted(CHART_IDS.values())
+            for animation_type in SIGNALS
+            for opt in subsets]
+
+
+def parse_job(text: str):
+    """
+    Converte 'tg:1:1,3' em Job(3, 1, [1, 3]).
+    """
+    chart, signal, params = text.split(':')
+    opt = [int(p) for p in params.split(',') if p]
+    if chart not in CHART_IDS or int(signal) not in SIGNALS or not set(opt) <= set(PARAMS):
+        raise ValueError(f'Job inválido: {text}')
+    return Job(CHART_IDS[chart], int(signal), opt)
+
+
+def job_filename(job: Job, out_dir: str):
+    """
+    Nome único da saida do job, ex: saida/tg_positivo_b0_b2.gif
+    """
+    chart = {v: k for k, v in CHART_IDS.items()}[job.chart_opt]
+    params = '_'.join(f'b{p - 1}' for p in job.opt)
+    return os.path.join(out_dir, f'{chart}_{SIGNALS[job.animation_type]}_{params}.gif')
+
+
+def job_key(job: Job):
+    import lab
+    return lab.animation_key(job.chart_opt, job.opt, job.animation_type)
+
+
+def is_up_to_date(job: Job, filename: str):
+    """
+    A saida está atualizada se existe e o .key ao lado bate com o hash atual das entradas.
+    """
+    try:
+        with open(filename + '.key') as f:
+            return os.path.exists(filename) and f.read().strip() == job_key(job)
+    except FileNotFoundError:
+        return False
+
+
+def _init_worker(constants: dict):
+    import matplotlib
+    matplotlib.use('Agg')
+    import lab
+    for name, value in constants.items():
+        setattr(lab, name, value)
+    lab.WORKERS = 1     # Processos do pool não podem criar outro pool
+
+
+def _run_job(args):
+    job, filename = args
+    import lab
+    start = time.perf_counter()
+    lab.render_animation(job.chart_opt, job.opt, job.animation_type, filename)
+    with open(filename + '.key', 'w') as f:
+        f.write(job_key(job))
+    return job, time.perf_counter() - start
+
+
+def run_batch(jobs, out_dir: str, workers: int = None, force: bool = False):
+    """
+    Renderiza os jobs em um pool de processos e retorna um resumo com a vazão.
+    """
+    import lab
+
+    os.makedirs(out_dir, exist_ok=True)
+    pending = []
+    skipped = 0
+    for job in jobs:
+        filename = job_filename(job, out_dir)
+        if not force and is_up_to_date(job, filename):
+            skipped += 1
+        else:
+            pending.append((job, filename))
+
+    start = time.perf_counter()
+    done = 0
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        from render import lab_constants
+        with get_context().Pool(workers, initializer=_init_worker, initargs=(lab_constants(),)) as pool:
+            for job, elapsed in pool.imap_unordered(_run_job, pending):
+                done += 1
+                print(f'[{done}/{len(pending)}] {os.path.basename(job_filename(job, out_dir))} ({elapsed:.2f}s)')
+    elapsed = time.perf_counter() - start
+
+    frames = done * lab.frame_count()
+    summary = {
+        'rendered': done,
+        'skipped': skipped,
+        'seconds': elapsed,
+        'jobs_per_s': done / elapsed if elapsed else 0.0,
+        'frames_per_s': frames / elapsed if elapsed else 0.0,
+    }
+    print(f"Renderizados: {done}, pulados: {skipped}, tempo: {elapsed:.2f}s, "
+          f"{summary['jobs_per_s']:.2f} jobs/s, {summary['frames_per_s']:.1f} frames/s")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Renderiza animações sem o menu interativo.')
+    parser.add_argument('--all', action='store_true', help='todos os 90 jobs')
+    parser.add_argument('--job', action='append', default=[], help="gráfico:sinal:opt, ex: tg:1:1,3")
+    parser.add_argument('--out', default='batch_output', help='pasta de saida')
+    parser.add_argument('--workers', type=int, default=None, help='processos (padrão: núcleos da CPU)')
+    parser.add_argument('--force', action='store_true', help='renderiza mesmo se a saida estiver atualizada')
+    args = parser.parse_args(argv)
+
+    jobs = all_jobs() if args.all else [parse_job(text) for text in args.job]
+    if not jobs:
+        parser.error('informe --all ou pelo menos um --job')
+    return run_batch(jobs, args.out, args.workers, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+#####################################
+# Benchmark da animação
+#
+# Mede cada etapa separada: calculo dos frames (update), desenho da figura e codificação,
+# para sen, cos e tg, combinações de opt e uma grade de SLICES, MAX_FRAMES e tamanho de figura.
+# Cada caso roda em um processo novo para o pico de memória (RSS) ser só dele.
+#
+# Uso: python bench.py --out base.json
+#      python bench.py --out novo.json --compare base.json --threshold 0.10
+#      python bench.py --imports       (tempo de import do lab.py, módulos mais lentos)
+#####################################
+
+CHARTS = {1: 'sen', 2: 'cos', 3: 'tg'}
+DEFAULT_OPTS = [[1], [2], [3], [4], [1, 2, 3, 4]]
+DEFAULT_SLICES = [1000, 5000]
+DEFAULT_FRAMES = [50, 150]
+DEFAULT_SIZES = [(10, 5)]
+METRICS = ('compute_s', 'draw_s', 'encode_s', 'total_s')
+MIN_DELTA_S = 0.005     # Diferenças de tempo menores que isso são ruido, não regressão
+
+
+def peak_rss_mb():
+    """
+    Pico de memória do processo em MB (ru_maxrss: KB no Linux, bytes no Mac).
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _run_case(case: dict):
+    """
+    Roda um caso em um processo novo e retorna os tempos de cada etapa.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import lab
+    from writers import writer_for
+
+    lab.SLICES = case['slices']
+    lab.MAX_FRAMES = lab.MIN_FRAMES + case['frames']
+    lab.FIG_X_SIZE, lab.FIG_Y_SIZE = case['size']
+    for name, value in case.get('constants', {}).items():
+        setattr(lab, name, value)
+
+    line, fig, x = lab.chart_config()
+    fig.axes[0].set_title(lab.chart_title(case['chart'], case['opt'], case['animation_type']))
+
+    start = time.perf_counter()
+    y_frames = lab.chart_frames(case['chart'], case['opt'], case['animation_type'], x)
+    compute = time.perf_counter() - start
+
+    draw = encode = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, f"bench.{case['format']}")
+        with writer_for(filename, lab.FPS).opened(filename) as writer:
+            for index in range(len(y_frames)):
+                # O frame só vale até a próxima chamada (buffers reaproveitados), então é
+                # calculado aqui dentro e não numa lista antes do desenho
+                start = time.perf_counter()
+                x_data, y_data = y_frames.frame(index)
+                compute += time.perf_counter() - start
+
+                start = time.perf_counter()
+                line.set_data(x_data, y_data)
+                fig.canvas.draw()
+                frame = fig.canvas.buffer_rgba()
+                draw += time.perf_counter() - start
+
+                start = time.perf_counter()
+                writer.write_rgba(frame)
+                encode += time.perf_counter() - start
+            start = time.perf_counter()
+        encode += time.perf_counter() - start  # close do writer (ffmpeg termina a codificação aqui)
+        size = os.path.getsize(filename)
+    plt.close(fig)
+
+    total = compute + draw + encode
+    return {
+        **case,
+        'compute_s': compute,
+        'draw_s': draw,
+        'encode_s': encode,
+        'total_s': total,
+        'fps': case['frames'] / total if total else 0.0,
+        'bytes': size,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def import_report(module: str = 'lab', top: int = 10):
+    """
+    Tempo de import de module em um interpretador novo (python -X importtime), com os
+    módulos de maior tempo acumulado. Retorna {'total_s', 'startup_s', 'modules': [(nome, s)]}.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, (here, os.environ.get('PYTHONPATH'))))}
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, env=env, check=True)
+    startup = time.perf_counter() - start
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.append((name.strip(), int(cumulative) / 1e6))
+    total = dict(modules).get(module, 0.0)
+    modules = [m for m in modules if m[0] != module]
+    return {'total_s': total, 'startup_s': startup, 'modules': sorted(modules, key=lambda m: -m[1])[:top]}
+
+
+def case_name(case: dict):
+    opt = ''.join(str(p - 1) for p in case['opt'])
+    w, h = case['size']
+    return f"{CHARTS[case['chart']]}_b{opt}_s{case['slices']}_f{case['frames']}_{w}x{h}_{case['format']}"
+
+
+def build_cases(opts, slices, frames, sizes, fmt='gif', animation_type=1, constants=None):
+    cases = []
+    for chart, opt, n_slices, n_frames, size in itertools.product(CHARTS, opts, slices, frames, sizes):
+        case = {'chart': chart, 'opt': opt, 'animation_type': animation_type, 'slices': n_slices,
+                'frames': n_frames, 'size': size, 'format': fmt, 'constants': constants or {}}
+        case['name'] = case_name(case)
+        cases.append(case)
+    return cases
+
+
+def run_cases(cases):
+    results = []
+    # maxtasksperchild=1: cada caso em um processo novo (RSS e cache de fontes não vazam entre casos)
+    with get_context().Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(_run_case, cases):
+            print(f"{result['name']:<40} compute {result['compute_s']:7.3f}s  draw {result['draw_s']:7.3f}s  "
+                  f"encode {result['encode_s']:7.3f}s  {result['fps']:7.1f} fps  {result['peak_rss_mb'] or 0:7.1f} MB")
+            results.append(result)
+    return results
+
+
+def compare(old: dict, new: dict, threshold: float):
+    """
+    Compara dois resultados pelo nome do caso. Retorna as regressões acima do threshold (ex: 0.10 = 10%).
+    """
+    old_cases = {r['name']: r for r in old['results']}
+    regressions = []
+    for result in new['results']:
+        base = old_cases.get(result['name'])
+        if base is None:
+            continue
+        for metric in METRICS + ('peak_rss_mb',):
+            before, after = base.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if metric in METRICS and after - before < MIN_DELTA_S:
+                continue
+            if change > threshold:
+                regressions.append((result['name'], metric, before, after, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark das etapas da animação.')
+    parser.add_argument('--out', default='bench.json', help='arquivo JSON com os resultados')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=0.10, help='regressão minima para alertar (0.10 = 10%%)')
+    parser.add_argument('--all-opts', action='store_true', help='todas as 15 combinações de opt')
+    parser.add_argument('--slices', type=int, nargs='+', default=DEFAULT_SLICES)
+    parser.add_argument('--frames', type=int, nargs='+', default=DEFAULT_FRAMES)
+    parser.add_argument('--sizes', nargs='+', default=[f'{w}x{h}' for w, h in DEFAULT_SIZES], help='ex: 10x5 6x3')
+    parser.add_argument('--format', default='gif', help='gif, mp4, webm ou apng')
+    parser.add_argument('--viewport', action='store_true',
+                        help='mantém VIEWPORT_SAMPLING/ADAPTIVE_POLES (por padrão desligados para SLICES valer)')
+    parser.add_argument('--imports', action='store_true', help='só mostra o tempo de import do lab.py')
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        report = import_report()
+        print(f"import lab: {report['total_s'] * 1000:.1f}ms (processo completo {report['startup_s'] * 1000:.1f}ms)")
+        for name, seconds in report['modules']:
+            print(f'  {name:<40} {seconds * 1000:8.1f}ms')
+        return 0
+
+    from batch import all_jobs
+    opts = sorted({tuple(job.opt) for job in all_jobs()}, key=lambda o: (len(o), o)) if args.all_opts else DEFAULT_OPTS
+    sizes = [tuple(int(v) for v in size.split('x')) for size in args.sizes]
+    constants = {} if args.viewport else {'VIEWPORT_SAMPLING': False, 'ADAPTIVE_POLES': False}
+    cases = build_cases([list(o) for o in opts], args.slices, args.frames, sizes, args.format, constants=constants)
+
+    import matplotlib
+    import numpy as np
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'machine': platform.platform(),
+        'import_s': import_report()['total_s'],
+        'results': run_cases(cases),
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados salvos em {args.out}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for name, metric, before, after, change in regressions:
+            print(f'REGRESSÃO {name} {metric}: {before:.3f} -> {after:.3f} (+{change:.0%})')
+        if regressions:
+            return 1
+        print('Nenhuma regressão acima do limite.')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
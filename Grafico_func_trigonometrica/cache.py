@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, a escrita continua atômica pelo os.replace
+    fcntl = None
+
+#####################################
+# Cache em disco das animações geradas
+#
+# A chave é o hash (sha256) de tudo que muda o arquivo final: gráfico, opt, animation_type,
+# constantes do módulo e formato. O arquivo codificado fica salvo com o nome da chave e
+# o mais antigo (mtime) é removido quando o cache passa de CACHE_MAX_BYTES (LRU).
+#####################################
+
+CACHE_VERSION = 2       # Mudar quando o desenho do gráfico mudar, invalida o cache antigo
+CACHE_DIR = os.environ.get('GRAFICO_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'grafico_trig'))
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def cache_key(chart_opt: int, opt: list, animation_type: int, constants: dict, fmt: str = 'gif'):
+    """
+    Hash das entradas da animação. A ordem de opt importa porque muda o titulo.
+    """
+    payload = {
+        'version': CACHE_VERSION,
+        'chart': chart_opt,
+        'opt': list(opt),
+        'animation_type': animation_type,
+        'constants': constants,
+        'format': fmt,
+    }
+    data = json.dumps(payload, sort_keys=True, default=repr).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+@contextmanager
+def _locked(cache_dir: str):
+    """
+    Trava exclusiva entre processos durante a escrita e a limpeza do cache.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, '.lock'), 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _entry(key: str, fmt: str, cache_dir: str):
+    return os.path.join(cache_dir, f'{key}.{fmt}')
+
+
+def cache_get(key: str, fmt: str = 'gif', cache_dir: str = CACHE_DIR):
+    """
+    Retorna o caminho do arquivo em cache (ou None) e marca como usado recentemente.
+    """
+    path = _entry(key, fmt, cache_dir)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def cache_put(key: str, src: str, fmt: str = 'gif', cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+    """
+    Copia o arquivo src (caminho ou bytes) para o cache (escrita atômica) e aplica o limite de tamanho.
+    """
+    with _locked(cache_dir):
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            if isinstance(src, bytes):
+                with open(tmp, 'wb') as f:
+                    f.write(src)
+            else:
+                shutil.copyfile(src, tmp)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, _entry(key, fmt, cache_dir))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        _evict(cache_dir, max_bytes)
+    return _entry(key, fmt, cache_dir)
+
+
+def _evict(cache_dir: str, max_bytes: int):
+    """
+    Remove as entradas usadas há mais tempo até o cache caber em max_bytes.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.startswith('.') or name.endswith('.tmp'):
+            continue
+        try:
+            stat = os.stat(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_render(key: str, filename: str, render, fmt: str = 'gif', cache_dir: str = CACHE_DIR):
+    """
+    Copia a animação do cache para filename, ou chama render(filename) e guarda o resultado.
+    filename também pode ser um BytesIO (a animação fica só na memória).
+    Retorna True quando veio do cache.
+    """
+    path = cache_get(key, fmt, cache_dir)
+    if path is not None:
+        try:
+            if hasattr(filename, 'write'):
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, filename)
+            else:
+                shutil.copyfile(path, filename)
+            return True
+        except FileNotFoundError:  # Removido por outro processo entre o get e a cópia
+            pass
+    render(filename)
+    cache_put(key, filename.getvalue() if hasattr(filename, 'getvalue') else filename, fmt, cache_dir)
+    return False
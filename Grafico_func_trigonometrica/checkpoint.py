@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from instrument import active
+
+#####################################
+# Exportação retomável (em blocos salvos em disco)
+#
+# Os frames são desenhados em blocos de CHUNK_FRAMES (um ou vários processos, como no
+# render.py) e cada bloco pronto é salvo na pasta de trabalho:
+#   pasta/manifest.json        entradas (gráfico, opt, animation_type, constantes) e os blocos
+#   pasta/chunk_00000.npz      frames RGBA do bloco 0 (comprimido, escrita atômica)
+# A pasta é CHECKPOINT_DIR/<hash das entradas>, então rodar de novo a mesma animação depois
+# de uma interrupção só desenha os blocos que faltam. No fim os blocos são juntados, em
+# ordem, no encoder do writers.py (qualquer formato) e a pasta é apagada.
+#
+# Uso: python checkpoint.py tg:1:1,3 --out tg.gif --workers 4
+#####################################
+
+CHUNK_FRAMES = 16       # Frames por bloco salvo (o máximo perdido numa interrupção, por processo)
+CHECKPOINT_DIR = os.environ.get('GRAFICO_CHECKPOINT_DIR',
+                                os.path.join(os.path.expanduser('~'), '.cache', 'grafico_trig_checkpoints'))
+MANIFEST = 'manifest.json'
+
+_worker = {}  # Pasta de trabalho de cada processo do pool
+
+
+def chunk_path(work_dir: str, index: int):
+    return os.path.join(work_dir, f'chunk_{index:05d}.npz')
+
+
+def read_manifest(work_dir: str):
+    """
+    Manifesto da pasta de trabalho (ou None se ainda não existe).
+    """
+    try:
+        with open(os.path.join(work_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path: str, write):
+    """
+    Escreve num temporário único (processos retomando a mesma pasta não se atrapalham),
+    força para o disco e renomeia: um arquivo com o nome final está completo.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def prepare_work_dir(chart_opt: int, opt: list, animation_type: int, chunk_size: int = CHUNK_FRAMES,
+                     work_dir: str = None):
+    """
+    Cria (ou reabre) a pasta de trabalho da animação e retorna (pasta, manifesto).
+    Uma pasta com o manifesto de outra animação não é reaproveitada (ValueError).
+    """
+    import lab
+    from cache import cache_key
+    from render import lab_constants
+
+    constants = lab_constants()
+    total = lab.frame_count()
+    key = cache_key(chart_opt, opt, animation_type, {**constants, 'CHUNK_FRAMES': chunk_size}, 'rgba')
+    work_dir = work_dir or os.path.join(CHECKPOINT_DIR, key[:16])
+    manifest = {
+        'key': key,
+        'chart_opt': chart_opt,
+        'opt': list(opt),
+        'animation_type': animation_type,
+        'constants': constants,
+        'frames': total,
+        'chunks': [[start, min(start + chunk_size, total)] for start in range(0, total, chunk_size)],
+    }
+    existing = read_manifest(work_dir)
+    if existing is None:
+        os.makedirs(work_dir, exist_ok=True)
+        _write_atomic(os.path.join(work_dir, MANIFEST),
+                      lambda f: f.write(json.dumps(manifest, indent=2, default=repr).encode()))
+    elif existing['key'] != key:
+        raise ValueError(f'{work_dir} tem blocos de outra animação (apague a pasta ou use outra)')
+    return work_dir, manifest
+
+
+def pending_chunks(work_dir: str, manifest: dict):
+    """
+    Blocos (indice, (inicio, fim)) que ainda não foram salvos.
+    """
+    return [(index, tuple(bounds)) for index, bounds in enumerate(manifest['chunks'])
+            if not os.path.exists(chunk_path(work_dir, index))]
+
+
+def _init_worker(chart_opt: int, opt: list, animation_type: int, constants: dict, work_dir: str):
+    from render import _init_worker as init_figure
+    init_figure(chart_opt, opt, animation_type, constants)
+    _worker['work_dir'] = work_dir
+
+
+def _render_chunk(args):
+    """
+    Desenha um bloco (render._render_chunk), salva os frames e retorna só os tempos.
+    """
+    from render import _render_chunk as render_chunk
+    index, bounds = args
+    rendered = render_chunk(bounds)
+    frames = np.stack([frame for frame, _ in rendered])
+    _write_atomic(chunk_path(_worker['work_dir'], index), lambda f: np.savez_compressed(f, frames=frames))
+    return index, bounds, [times for _, times in rendered]
+
+
+def render_chunks(chart_opt: int, opt: list, animation_type: int, work_dir: str, manifest: dict,
+                  workers: int = 1):
+    """
+    Desenha e salva os blocos que faltam. Retorna quantos blocos foram desenhados agora.
+    Com workers <= 1 desenha no próprio processo (sem pool), então funciona também dentro
+    de um processo de pool (ex: batch.py).
+    """
+    pending = pending_chunks(work_dir, manifest)
+    if not pending:
+        return 0
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    tracer = active()
+
+    def record(results):
+        for _, (start, _), times in results:
+            if tracer is None:
+                continue
+            for index, (pid, t0, t1, t2) in enumerate(times, start):
+                tracer.record('compute', index, t0, t1, pid=pid)
+                tracer.record('draw', index, t1, t2, pid=pid)
+
+    if workers <= 1:
+        import lab
+        from render import _worker as figure, setup_figure
+        setup_figure(chart_opt, opt, animation_type, manifest['constants'])
+        _worker['work_dir'] = work_dir
+        try:
+            record(map(_render_chunk, pending))
+        finally:
+            lab.pyplot().close(figure.pop('fig'))
+            figure.clear()
+    else:
+        with get_context().Pool(workers, initializer=_init_worker,
+                                initargs=(chart_opt, opt, animation_type, manifest['constants'], work_dir)) as pool:
+            record(pool.imap_unordered(_render_chunk, pending))
+    return len(pending)
+
+
+def assemble(work_dir: str, manifest: dict, filename, fps: int = 20):
+    """
+    Junta os blocos salvos, em ordem, no encoder do formato de filename (writers.py).
+    """
+    from writers import writer_for
+
+    tracer = active()
+    index = 0
+    with writer_for(filename, fps).opened(filename) as writer:
+        for chunk in range(len(manifest['chunks'])):
+            with np.load(chunk_path(work_dir, chunk)) as data:
+                frames = data['frames']
+            for frame in frames:
+                start, before = time.perf_counter(), writer.bytes_written
+                writer.write_rgba(frame)
+                if tracer is not None:
+                    tracer.record('encode', index, start, time.perf_counter(), writer.bytes_written - before)
+                index += 1
+
+
+def save_checkpointed(chart_opt: int, opt: list, animation_type: int, filename, fps: int = 20,
+                      workers: int = 1, chunk_size: int = CHUNK_FRAMES, work_dir: str = None, keep: bool = False):
+    """
+    Exporta a animação guardando cada bloco pronto em disco. Se uma exportação igual foi
+    interrompida antes, continua dos blocos que faltam. Com keep a pasta não é apagada no fim.
+    Retorna {'chunks', 'rendered', 'resumed'} (blocos no total, desenhados agora e reaproveitados).
+    """
+    work_dir, manifest = prepare_work_dir(chart_opt, opt, animation_type, chunk_size, work_dir)
+    rendered = render_chunks(chart_opt, opt, animation_type, work_dir, manifest, workers)
+    assemble(work_dir, manifest, filename, fps)
+    if not keep:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    total = len(manifest['chunks'])
+    return {'chunks': total, 'rendered': rendered, 'resumed': total - rendered}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exporta uma animação em blocos retomáveis.')
+    parser.add_argument('job', help="gráfico:sinal:opt, ex: tg:1:1,3")
+    parser.add_argument('--out', default='animation.gif', help='arquivo de saida (o formato vem da extensão)')
+    parser.add_argument('--workers', type=int, default=1, help='processos que desenham os blocos')
+    parser.add_argument('--chunk', type=int, default=CHUNK_FRAMES, help='frames por bloco salvo')
+    parser.add_argument('--work-dir', default=None, help=f'pasta dos blocos (padrão: dentro de {CHECKPOINT_DIR})')
+    parser.add_argument('--keep', action='store_true', help='não apaga os blocos no fim')
+    args = parser.parse_args(argv)
+
+    import lab
+    from batch import parse_job
+    job = parse_job(args.job)
+    start = time.perf_counter()
+    summary = save_checkpointed(job.chart_opt, job.opt, job.animation_type, args.out, fps=lab.FPS,
+                                workers=args.workers, chunk_size=args.chunk, work_dir=args.work_dir, keep=args.keep)
+    print(f"{args.out}: {summary['chunks']} blocos ({summary['resumed']} retomados, {summary['rendered']} "
+          f"desenhados) em {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,9 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.animation import FuncAnimation, PillowWriter
+from io import BytesIO
 from IPython.display import Image, clear_output, display,HTML
+from PIL import Image as PILImage
 
 #####################################
 # b_0 - Deslocamento Vertical
@@ -53,6 +54,10 @@ MAX_X_LIM = 4 * PI      # Final do grafico do eixo X
 MIN_Y_LIM = -40         # Inicio do grafico do eixo Y
 MAX_Y_LIM = 40         # Final do grafico do eixo Y
 
+COMBINED = True         # Seno, cosseno e tangente numa figura e num GIF só (mais rápido que 3 animações)
+OVERLAY = False         # Com COMBINED: as 3 curvas no mesmo gráfico em vez de 3 subplots
+SAVE_FILE = False       # Também grava o GIF em disco (por padrão fica só na memória e vai direto para o display)
+
 def ask_input(msg: str, input_msg: str, error_msg: str, input_range: list, mult_choice=False):
     """
     Solicita a entrada do usuário com validação de intervalo.
@@ -95,7 +100,11 @@ def chart_config():
     print(x)
     # Criação da linha inicial no gráfico
     line, = ax.plot(x, SEN(x))
+    axis_config(ax)
+
+    return line,fig,x
 
+def axis_config(ax):
     # Configuração dos limites do gráfico
     ax.set_xlim(MIN_X_LIM, MAX_X_LIM)
     ax.set_ylim(MIN_Y_LIM, MAX_Y_LIM)
@@ -109,7 +118,21 @@ def chart_config():
     ax.xaxis.set_ticks_position('bottom')
     ax.yaxis.set_ticks_position('left')
 
-    return line,fig,x
+def compute_frames(func, x, frames, opt: list, animation_type: int):
+    """
+    Calcula todos os frames da animação de uma vez, tensor (frames, SLICES).
+    b_0 + b_1 * func(b_2 * x + b_3) com broadcast e operações no mesmo buffer.
+    """
+    steps = np.asarray(frames, dtype=np.float64) / FRAME_DIV
+    steps = steps if animation_type > 0 else -steps
+    neutral = (0.0, 1.0, 1.0, 0.0)
+    b_0, b_1, b_2, b_3 = (steps[:, None] if (i + 1) in opt else neutral[i] for i in range(4))
+    y = np.multiply(np.broadcast_to(b_2, (len(steps), 1)), x)
+    y += b_3
+    func(y, out=y)
+    y *= b_1
+    y += b_0
+    return y
 
 def label_chart(chart_name: str, opt: list):
     """
@@ -131,33 +154,23 @@ def plot_sin_dynamic(opt, animation_type):
     Plota um gráfico dinâmico do seno, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
     """
 
-    # Função de atualização para animação
+    global x_signal
+    line,fig,x = chart_config()
+    frames = np.arange(MIN_FRAMES, MAX_FRAMES)
+    y_frames = compute_frames(SEN, x, frames, opt, animation_type)  # SENO  a * sen((b*x)*c)+d
+    x_signal = 'positivo' if animation_type > 0 else 'negativo'
+
+    # Função de atualização para animação (só escolhe a linha já calculada)
     def update(frame):
-        global animation_frame, x_signal
+        global animation_frame
         animation_frame = frame
-        possible_frame = {
-            0: -1*(frame / FRAME_DIV),
-            1: (frame / FRAME_DIV)}
-        animation_step = possible_frame[animation_type]
-        # print(animation_step) evita flood de dados no output do colab
-        x_signal = 'positivo' if animation_type > 0 else 'negativo'
-        b_0 = animation_step if 1 in opt else 0
-        b_1 = animation_step if 2 in opt else 1
-        b_2 = animation_step if 3 in opt else 1
-        b_3 = animation_step if 4 in opt else 0
-        y = b_0 + (b_1 * SEN((b_2 * x) + b_3)) # SENO  a * sen((b*x)*c)+d
-        line.set_ydata(y)
+        line.set_ydata(y_frames[frame - MIN_FRAMES])
         return line,
 
-    line,fig,x = chart_config()
-
-    # Criação da animação
-    ani = FuncAnimation(fig, update, frames=np.arange(
-        MIN_FRAMES, MAX_FRAMES), interval=INTERVAL, blit=True)
+    # Criação da animação (GIF na memória)
     label_selected = label_chart('Sen', opt)
     plt.title(f'{label_selected} {x_signal}')
-    ani.save('animation_sen.gif', writer=PillowWriter(fps=20))
-    display(Image(filename='animation_sen.gif'))
+    show_gif(encode_blit_gif(fig, [line], update, frames), 'animation_sen.gif')
     plt.close(fig)
 
 
@@ -165,68 +178,119 @@ def plot_cos_dynamic(opt, animation_type):
     """
     Plota um gráfico dinâmico do cosseno, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
     """
-    # Função de atualização para animação
+    global x_signal
+    line,fig,x = chart_config()
+    frames = np.arange(MIN_FRAMES, MAX_FRAMES)
+    y_frames = compute_frames(COS, x, frames, opt, animation_type)  # COSSENO  a * cos((b*x)*c)+d
+    x_signal = 'positivo' if animation_type > 0 else 'negativo'
+
+    # Função de atualização para animação (só escolhe a linha já calculada)
     def update(frame):
-        global animation_frame, x_signal
+        global animation_frame
         animation_frame = frame
-        possible_frame = {
-            0: -1*(frame / FRAME_DIV),
-            1: (frame / FRAME_DIV)}
-        animation_step = possible_frame[animation_type]
-        # print(animation_step) evita flood de dados no output do colab
-        x_signal = 'positivo' if animation_type > 0 else 'negativo'
-        b_0 = animation_step if 1 in opt else 0
-        b_1 = animation_step if 2 in opt else 1
-        b_2 = animation_step if 3 in opt else 1
-        b_3 = animation_step if 4 in opt else 0
-        y = b_0 + (b_1 * COS((b_2 * x) + b_3))  # COSSENO  a * cos((b*x)*c)+d
-        line.set_ydata(y)
+        line.set_ydata(y_frames[frame - MIN_FRAMES])
         return line,
 
-    line,fig,x = chart_config()
-
-    # Criação da animação
-    ani = FuncAnimation(fig, update, frames=np.arange(
-        MIN_FRAMES, MAX_FRAMES), interval=INTERVAL, blit=True)
+    # Criação da animação (GIF na memória)
     label_selected = label_chart('Cos', opt)
     plt.title(f'{label_selected} {x_signal}')
-    ani.save('animation_cos.gif', writer=PillowWriter(fps=20))
-    display(Image(filename='animation_cos.gif'))
+    show_gif(encode_blit_gif(fig, [line], update, frames), 'animation_cos.gif')
     plt.close(fig)
 
 def plot_tg_dynamic(opt, animation_type):
     """
     Plota um gráfico dinâmico da tangente, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
     """
-    # Função de atualização para animação
+    global x_signal
+    line,fig,x = chart_config()
+    frames = np.arange(MIN_FRAMES, MAX_FRAMES)
+    y_frames = compute_frames(TG, x, frames, opt, animation_type)  # TANGENTE  a * tg((b*x)*c)+d
+    x_signal = 'positivo' if animation_type > 0 else 'negativo'
+
+    # Função de atualização para animação (só escolhe a linha já calculada)
     def update(frame):
-        global animation_frame, x_signal
+        global animation_frame
         animation_frame = frame
-        possible_frame = {
-            0: -1*(frame / FRAME_DIV),
-            1: (frame / FRAME_DIV)}
-        animation_step = possible_frame[animation_type]
-        # print(animation_step) evita flood de dados no output do colab
-        x_signal = 'positivo' if animation_type > 0 else 'negativo'
-        b_0 = animation_step if 1 in opt else 0
-        b_1 = animation_step if 2 in opt else 1
-        b_2 = animation_step if 3 in opt else 1
-        b_3 = animation_step if 4 in opt else 0
-        y = b_0 + (b_1 * TG((b_2 * x) + b_3)) # TANGENTE  a * tg((b*x)*c)+d
-        line.set_ydata(y)
+        line.set_ydata(y_frames[frame - MIN_FRAMES])
         return line,
 
-    line,fig,x = chart_config()
-
-    # Criação da animação
-    ani = FuncAnimation(fig, update, frames=np.arange(
-        MIN_FRAMES, MAX_FRAMES), interval=INTERVAL, blit=True)
+    # Criação da animação (GIF na memória)
     label_selected = label_chart('Tg', opt)
     plt.title(f'{label_selected} {x_signal}')
-    ani.save('animation_tg.gif', writer=PillowWriter(fps=20))
-    display(Image(filename='animation_tg.gif'))
+    show_gif(encode_blit_gif(fig, [line], update, frames), 'animation_tg.gif')
+    plt.close(fig)
+
+def plot_all_dynamic(opt, animation_type):
+    """
+    Plota seno, cosseno e tangente numa figura só (3 subplots, ou sobrepostos com OVERLAY),
+    com um domínio compartilhado, um fundo estático e uma única animação/GIF.
+    """
+    global x_signal
+    charts = [('Sen', SEN), ('Cos', COS), ('Tg', TG)]
+    x = np.linspace(MIN_LINSPACE, MAX_LINSPACE, SLICES)  # Domínio compartilhado
+    frames = np.arange(MIN_FRAMES, MAX_FRAMES)
+    x_signal = 'positivo' if animation_type > 0 else 'negativo'
+
+    if OVERLAY:
+        fig, ax = plt.subplots(figsize=(FIG_X_SIZE, FIG_Y_SIZE))
+        axes = [ax, ax, ax]
+    else:
+        fig, axes = plt.subplots(3, 1, figsize=(FIG_X_SIZE, FIG_Y_SIZE * 3))
+
+    lines, y_frames = [], []
+    for ax, (name, func) in zip(axes, charts):
+        line, = ax.plot(x, func(x), label=name)
+        lines.append(line)
+        y_frames.append(compute_frames(func, x, frames, opt, animation_type))
+    for ax in dict.fromkeys(axes):
+        axis_config(ax)
+
+    # Todas as linhas andam juntas na mesma animação
+    def update(frame):
+        global animation_frame
+        animation_frame = frame
+        for line, y in zip(lines, y_frames):
+            line.set_ydata(y[frame - MIN_FRAMES])
+        return lines
+
+    if OVERLAY:
+        ax.legend(loc='upper right')
+        ax.set_title(f"{label_chart('Sen, Cos, Tg', opt)} {x_signal}")
+    else:
+        for ax, (name, _) in zip(axes, charts):
+            ax.set_title(f'{label_chart(name, opt)} {x_signal}')
+    fig.tight_layout()
+    show_gif(encode_blit_gif(fig, lines, update, frames), 'animation_all.gif')
     plt.close(fig)
 
+def encode_blit_gif(fig, artists, update, frames, fps=20):
+    """
+    Codifica o GIF na memória e retorna os bytes, desenhando o fundo estático (eixos, ticks,
+    titulos) uma vez só: em cada frame só as linhas são desenhadas por cima do fundo guardado (blit).
+    """
+    for artist in artists:
+        artist.set_animated(True)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+    images = []
+    for frame in frames:
+        fig.canvas.restore_region(background)
+        for artist in update(frame):
+            artist.axes.draw_artist(artist)
+        images.append(PILImage.fromarray(np.asarray(fig.canvas.buffer_rgba())).convert('RGB'))
+    buffer = BytesIO()
+    images[0].save(buffer, format='GIF', save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+    return buffer.getvalue()
+
+def show_gif(data: bytes, filename: str):
+    """
+    Mostra o GIF direto dos bytes (sem gravar e ler de novo). Com SAVE_FILE também grava em filename.
+    """
+    if SAVE_FILE:
+        with open(filename, 'wb') as f:
+            f.write(data)
+    display(Image(data=data, format='gif'))
+
 def select_chart():
     """
     Retorna uma função e valor correspondente ao nome da função trigonometrica
@@ -273,8 +337,11 @@ def main():
     )
     clear_output()
     # selected_chart(opt, animation_type) executa só 1 animação
-    for chart in all_charts():
-      chart(opt,animation_type)
+    if COMBINED:
+      plot_all_dynamic(opt, animation_type)  # as 3 funções numa animação só
+    else:
+      for chart in all_charts():
+        chart(opt,animation_type)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from engine import MAX_TENSOR_BYTES, eval_frames
+
+#####################################
+# Exportação só dos dados (sem figura)
+#
+# Os frames calculados pelo update vão direto para arquivos .npy mapeados em memória:
+#   pasta/y.npy       (F, N)  y de cada frame (escrito bloco a bloco dentro do memmap)
+#   pasta/x.npy       (N,)    domínio
+#   pasta/params.npy  (F, 4)  b_0, b_1, b_2 e b_3 de cada frame
+#   pasta/meta.json           gráfico, opt, animation_type e constantes usadas
+# Quem lê abre com load_frames (mmap_mode='r'): nada é copiado e as fatias são lidas do
+# disco só quando usadas. Vários processos podem abrir os mesmos arquivos sem pickle.
+#
+# Uso: python dataset.py tg:1:1,3 --out dados_tg
+#####################################
+
+FrameData = namedtuple('FrameData', 'x y params meta')
+
+
+def export_params(func, x, params, out_dir: str, meta: dict = None, dtype=np.float64,
+                  max_bytes: int = MAX_TENSOR_BYTES):
+    """
+    Calcula b_0 + b_1 * func(b_2 * x + b_3) para cada linha de params e escreve em out_dir.
+    O calculo é feito direto dentro do memmap, em blocos de no máximo max_bytes.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    x = np.asarray(x, dtype=dtype)
+    total = len(params[0])
+    np.save(os.path.join(out_dir, 'x.npy'), x)
+    np.save(os.path.join(out_dir, 'params.npy'), np.stack(params, axis=1).astype(dtype))
+
+    y = np.lib.format.open_memmap(os.path.join(out_dir, 'y.npy'), mode='w+', dtype=dtype, shape=(total, len(x)))
+    chunk_size = max(1, max_bytes // max(1, y.strides[0]))
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        eval_frames(func, x, *(b[start:stop] for b in params), out=y[start:stop])
+    y.flush()
+    del y
+
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'func': func.__name__, 'frames': total, 'samples': len(x),
+                   'dtype': np.dtype(dtype).name, **(meta or {})}, f, indent=2)
+
+
+def export_frames(chart_opt: int, opt: list, animation_type: int, out_dir: str):
+    """
+    Exporta os frames de uma animação do lab.py (mesmo domínio e parâmetros, sem figura).
+    """
+    import lab
+    from render import lab_constants
+
+    timeline = lab.chart_timeline(opt, animation_type)
+    times = timeline.times(lab.FPS)
+    meta = {'chart_opt': chart_opt, 'opt': list(opt), 'animation_type': animation_type,
+            'constants': lab_constants()}  # Frame k é o instante k / FPS
+    export_params(lab.CHARTS[chart_opt][1], lab.chart_domain(), timeline.params(times), out_dir, meta,
+                  dtype=np.float32 if lab.FLOAT32 else np.float64)
+
+
+def load_frames(out_dir: str, mmap_mode: str = 'r'):
+    """
+    Abre uma exportação sem copiar: x, y e params são memmaps (leitura preguiçosa).
+    """
+    with open(os.path.join(out_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    return FrameData(*(np.load(os.path.join(out_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+                       for name in ('x', 'y', 'params')), meta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exporta os valores dos frames para .npy (sem desenhar).')
+    parser.add_argument('job', help="gráfico:sinal:opt, ex: tg:1:1,3")
+    parser.add_argument('--out', default='dados', help='pasta de saida')
+    args = parser.parse_args(argv)
+
+    from batch import parse_job
+    job = parse_job(args.job)
+    start = time.perf_counter()
+    export_frames(job.chart_opt, job.opt, job.animation_type, args.out)
+    data = load_frames(args.out)
+    print(f'{data.y.shape[0]} frames x {data.y.shape[1]} pontos em {args.out} '
+          f'({data.y.nbytes / 1e6:.1f} MB, {time.perf_counter() - start:.2f}s)')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
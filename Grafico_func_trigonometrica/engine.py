@@ -0,0 +1,315 @@
+import numpy as np
+
+#####################################
+# Motor de cálculo dos frames
+#
+# Em vez de calcular  y = b_0 + b_1 * f(b_2 * x + b_3)  frame a frame dentro do update,
+# todos os frames são calculados de uma vez só com broadcast do NumPy:
+#   frames (F,) x dominio (SLICES,) -> tensor (F, SLICES)
+#####################################
+
+MAX_TENSOR_BYTES = 256 * 1024 * 1024   # Acima disso o tensor é calculado em blocos (chunks)
+VIEWPORT_MARGIN = 0.05                 # Margem (fração da largura visivel) calculada fora dos limites do eixo X
+PILOT_POINTS = 32                      # Pontos da amostra piloto de cada ramo entre polos
+ANGLE_RESOLUTION = 0.05                # Giro (radianos, na tela) que vale tanto quanto 1 pixel de comprimento
+MAX_SHIFT_DENSITY = 1.1                # Grade da tabela de deslocamento até 10% mais densa que o x original
+
+# Funções com polos: periodo, posição do primeiro polo e inversa (cada ramo é monotônico)
+POLE_FUNCTIONS = {
+    np.tan: (np.pi, np.pi / 2, np.arctan),
+}
+
+
+NEUTRAL = (0.0, 1.0, 1.0, 0.0)          # Valores de b_0..b_3 que não mudam a função (operação pode ser pulada)
+
+
+def eval_frames(func, x, b_0, b_1, b_2, b_3, out=None, dtype=np.float64):
+    """
+    Calcula b_0 + b_1 * func(b_2 * x + b_3) para todos os frames de uma vez.
+    b_0..b_3 são vetores (F,) e x é o domínio (N,), o resultado tem formato (F, N).
+    Tudo é feito dentro de out (sem arrays temporários) e as operações com parâmetro
+    no valor neutro em todos os frames (b_1 == 1, b_3 == 0, ...) são puladas.
+    """
+    if out is None:
+        out = np.empty((len(b_2), x.shape[0]), dtype=dtype)
+    params = [np.asarray(b, dtype=out.dtype)[:, None] for b in (b_0, b_1, b_2, b_3)]
+    skip = [not (b != neutral).any() for b, neutral in zip(params, NEUTRAL)]
+    b_0, b_1, b_2, b_3 = params
+    if skip[2]:
+        np.copyto(out, x, casting='same_kind')
+    else:
+        np.multiply(b_2, x, out=out, casting='same_kind')
+    if not skip[3]:
+        out += b_3
+    func(out, out=out)
+    if not skip[1]:
+        out *= b_1
+    if not skip[0]:
+        out += b_0
+    return out
+
+
+def eval_frame(func, x, b_0: float, b_1: float, b_2: float, b_3: float, out):
+    """
+    Mesmo calculo de eval_frames para um frame só, escrito no buffer out (N,) já alocado.
+    """
+    if b_2 == 1:
+        np.copyto(out, x, casting='same_kind')
+    else:
+        np.multiply(x, b_2, out=out, casting='same_kind')
+    if b_3 != 0:
+        out += b_3
+    func(out, out=out)
+    if b_1 != 1:
+        out *= b_1
+    if b_0 != 0:
+        out += b_0
+    return out
+
+
+def iter_param_chunks(func, x, params, chunk_size: int = None, dtype=np.float64, max_bytes: int = MAX_TENSOR_BYTES):
+    """
+    Gera o tensor dos vetores b_0..b_3 (um valor por linha) em blocos, mantendo a memória
+    limitada. Retorna (indice_inicial, bloco) a cada iteração. Sem chunk_size, cada bloco ocupa no máximo max_bytes. O buffer é reaproveitado entre blocos.
+    """
+    total = len(params[0])
+    if chunk_size is None:
+        chunk_size = max(1, max_bytes // (x.shape[0] * np.dtype(dtype).itemsize))
+    buffer = np.empty((min(chunk_size, total), x.shape[0]), dtype=dtype)
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        block = eval_frames(func, x, *(b[start:stop] for b in params), out=buffer[:stop - start])
+        yield start, block
+
+
+def viewport_domain(x_min: float, x_max: float, width_px: int, samples_per_pixel: int = 2,
+                    margin: float = VIEWPORT_MARGIN):
+    """
+    Domínio só da parte visivel do eixo X (mais uma margem), com a quantidade de pontos
+    tirada da largura da figura em pixels. Sempre tem colunas * samples_per_pixel pontos.
+    """
+    span = x_max - x_min
+    columns = int(np.ceil(width_px * (1 + 2 * margin)))
+    return np.linspace(x_min - margin * span, x_max + margin * span, columns * samples_per_pixel)
+
+
+def decimate_x(x, columns: int):
+    """
+    X desenhado depois da decimação: as bordas de cada coluna (2 pontos por coluna).
+    """
+    edges = x.reshape(columns, -1)
+    return np.stack((edges[:, 0], edges[:, -1]), axis=-1).reshape(-1)
+
+
+def decimate_minmax(y, columns: int):
+    """
+    Decimação min/max por coluna de pixel: cada coluna vira 2 pontos (minimo e maximo,
+    na ordem em que aparecem), então os picos continuam exatos. Funciona em (N,) ou (F, N).
+    """
+    y = np.asarray(y)
+    cols = y.reshape(*y.shape[:-1], columns, -1)
+    i_min = cols.argmin(axis=-1)[..., None]
+    i_max = cols.argmax(axis=-1)[..., None]
+    y_min = np.take_along_axis(cols, i_min, axis=-1)
+    y_max = np.take_along_axis(cols, i_max, axis=-1)
+    min_first = i_min <= i_max
+    first = np.where(min_first, y_min, y_max)
+    second = np.where(min_first, y_max, y_min)
+    return np.concatenate((first, second), axis=-1).reshape(*y.shape[:-1], 2 * columns)
+
+
+class FrameTensor:
+    """
+    Acesso por indice aos frames de uma animação.
+    Se o tensor completo couber em max_bytes ele é calculado de uma vez,
+    senão é calculado em blocos sob demanda (só o bloco atual fica na memória).
+    Com columns cada frame sai com a decimação min/max (2 * columns pontos).
+    O bloco é alocado uma vez por figura; dtype=np.float32 usa metade da memória.
+
+    Quando só b_0 (deslocamento) e/ou b_3 (fase) variam, todo frame é a mesma curva
+    deslocada: a curva base é calculada uma vez (tabela) e cada frame vira uma fatia dela
+    mais um escalar, sem chamar np.sin/np.cos/np.tan de novo (ver _plan_shift).
+
+    params são os vetores b_0..b_3 (um valor por frame, ex: de uma timeline.Timeline).
+    steps é o valor que identifica cada frame no trace (ex: o parâmetro animado); padrão: o indice.
+    """
+
+    def __init__(self, func, x, params, steps=None, chunk_size: int = None, max_bytes: int = MAX_TENSOR_BYTES,
+                 columns: int = None, dtype=np.float64):
+        self.func = func
+        self.x = np.asarray(x, dtype=dtype)
+        self.columns = columns
+        self.params = tuple(np.asarray(b, dtype=np.float64) for b in params)
+        self.steps = np.arange(len(self.params[0]), dtype=np.float64) if steps is None else np.asarray(steps)
+        self._base = None
+        if columns is None:
+            self._plan_shift()
+        self.x_plot = self.x if columns is None else decimate_x(self.x, columns)
+        row_bytes = self.x.shape[0] * np.dtype(dtype).itemsize
+        if chunk_size is None:
+            chunk_size = max(1, max_bytes // row_bytes)
+        self.chunk_size = min(chunk_size, len(self.steps)) or 1
+        self._start = None
+        self._block = np.empty((self.chunk_size, self.x.shape[0]), dtype=dtype)
+        self._rows = self._block
+        self._block_len = 0
+
+    def _plan_shift(self):
+        """
+        Monta a tabela base quando b_1 e b_2 ficam no valor neutro em todos os frames.
+        Como f(x + b_3) em uma grade uniforme é só a curva deslocada, a grade é ajustada
+        para o passo de b_3 entre frames ser um número inteiro de pontos: assim o frame k
+        é base[offset_k : offset_k + N] (leitura de memória, sem interpolação).
+        Se o passo de b_3 for menor que o da grade, a grade ajustada ficaria mais densa que x
+        (mais pontos por frame para desenhar); acima de MAX_SHIFT_DENSITY usa o calculo normal.
+        """
+        b_0, b_1, b_2, b_3 = self.params
+        if (b_1 != 1).any() or (b_2 != 1).any() or len(self.x) < 2:
+            return
+        x = self.x
+        if not (b_3 != b_3[0]).any():
+            # Fase constante (só b_0 varia): a curva é sempre a mesma
+            self._base = self.func(x + x.dtype.type(b_3[0]))
+            self._offsets = np.zeros(len(b_3), dtype=np.intp)
+            return
+
+        dx = (x[-1] - x[0]) / (len(x) - 1)
+        if not np.allclose(np.diff(x), dx, rtol=1e-3):
+            return
+        delta = np.abs(np.diff(b_3))
+        delta = delta[delta > 0].min()
+        dx = delta / max(1, round(delta / dx))  # Passo da grade que divide o passo da fase
+        offsets = (b_3 - b_3.min()) / dx
+        rounded = np.rint(offsets)
+        if not np.allclose(offsets, rounded, atol=1e-6):
+            return
+        n = int(np.ceil((x[-1] - x[0]) / dx)) + 1
+        if n > len(x) * MAX_SHIFT_DENSITY:
+            return
+        self.x = (x[0] + dx * np.arange(n)).astype(x.dtype)
+        self._offsets = rounded.astype(np.intp)
+        table = x[0] + b_3.min() + dx * np.arange(n + self._offsets.max())
+        self._base = self.func(table).astype(x.dtype)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def _load(self, start: int):
+        stop = min(start + self.chunk_size, len(self.steps))
+        block = self._block[:stop - start]
+        if self._base is None:
+            eval_frames(self.func, self.x, *(b[start:stop] for b in self.params), out=block)
+        else:
+            n = len(self.x)
+            for row, offset in zip(block, self._offsets[start:stop]):
+                row[:] = self._base[offset:offset + n]
+            b_0 = self.params[0][start:stop]
+            if b_0.any():
+                block += b_0.astype(block.dtype)[:, None]
+        self._rows = block if self.columns is None else decimate_minmax(block, self.columns)
+        self._start, self._block_len = start, stop - start
+
+    def __getitem__(self, index: int):
+        if self._start is None or not (self._start <= index < self._start + self._block_len):
+            self._load((index // self.chunk_size) * self.chunk_size)
+        return self._rows[index - self._start]
+
+    def frame(self, index: int):
+        """
+        Retorna (x, y) do frame para o line.set_data.
+        y é uma linha do bloco reaproveitado: só vale até a próxima chamada (copie para guardar).
+        """
+        return self.x_plot, self[index]
+
+
+class PoleFrames:
+    """
+    Frames com amostragem adaptativa para funções com polos (tangente).
+    Para cada frame os polos de b_2 * x + b_3 são calculados analiticamente e viram NaN
+    (sem a linha vertical falsa), só a parte de cada ramo dentro dos limites do Y é amostrada
+    e os pontos são distribuidos pelo comprimento do traço na tela mais a curvatura.
+    Cada frame tem sempre points pontos (o que sobrar é NaN no final).
+    params e steps funcionam como no FrameTensor.
+    """
+
+    def __init__(self, func, params, x_lim: tuple, y_lim: tuple, size_px: tuple, points: int, steps=None):
+        self.period, self.first_pole, self.inverse = POLE_FUNCTIONS[func]
+        self.func = func
+        self.params = tuple(np.asarray(b, dtype=np.float64) for b in params)
+        self.steps = np.arange(len(self.params[0]), dtype=np.float64) if steps is None else np.asarray(steps)
+        self.x_lim, self.y_lim = x_lim, y_lim
+        self.points = points
+        self._x = np.empty(points)  # Buffers reaproveitados em todo frame (o set_data copia)
+        self._y = np.empty(points)
+        # Escala de unidades do gráfico para pixels
+        self.scale = (size_px[0] / (x_lim[1] - x_lim[0]), size_px[1] / (y_lim[1] - y_lim[0]))
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, index: int):
+        return self.frame(index)[1]
+
+    def frame(self, index: int):
+        """
+        Retorna (x, y) do frame para o line.set_data.
+        x e y são os mesmos buffers em toda chamada: só valem até a próxima (copie para guardar).
+        """
+        b_0, b_1, b_2, b_3 = (float(b[index]) for b in self.params)
+        x, y = self._x, self._y
+        x.fill(np.nan)
+        y.fill(np.nan)
+        if b_1 == 0 or b_2 == 0:
+            # Reta horizontal (sem polos visiveis)
+            x[:2] = self.x_lim
+            y[:2] = b_0 + b_1 * self.func(b_3)
+            return x, y
+
+        # Faixa do argumento u = b_2 * x + b_3 visivel no eixo X
+        u_a, u_b = sorted((b_2 * self.x_lim[0] + b_3, b_2 * self.x_lim[1] + b_3))
+        # Faixa de func(u) que cai dentro do Y (com margem para a linha sair da área do gráfico)
+        margin = 0.05 * (self.y_lim[1] - self.y_lim[0])
+        t_lo, t_hi = sorted(((self.y_lim[0] - margin - b_0) / b_1, (self.y_lim[1] + margin - b_0) / b_1))
+        lo, hi = self.inverse(t_lo), self.inverse(t_hi)
+
+        # Ramos k: u entre first_pole + (k-1)*period e first_pole + k*period
+        k = np.arange(np.floor((u_a - self.first_pole) / self.period) + 1,
+                      np.floor((u_b - self.first_pole) / self.period) + 2)
+        center = self.first_pole + (k - 0.5) * self.period
+        start = np.maximum(center + lo, u_a)
+        stop = np.minimum(center + hi, u_b)
+        keep = stop > start
+        start, stop = start[keep], stop[keep]
+        if not len(start):
+            return x, y
+
+        # Amostra piloto (K, PILOT_POINTS) e peso de cada trecho: comprimento em pixels + giro
+        pilot = np.linspace(start, stop, PILOT_POINTS, axis=1)
+        px = (pilot - b_3) / b_2 * self.scale[0]
+        py = (b_0 + b_1 * self.func(pilot)) * self.scale[1]
+        dx, dy = np.diff(px, axis=1), np.diff(py, axis=1)
+        length = np.hypot(dx, dy)
+        angle = np.arctan2(dy, dx)
+        turn = np.abs(np.diff(angle, axis=1, prepend=angle[:, :1]))
+        weight = np.cumsum(length + turn / ANGLE_RESOLUTION, axis=1)
+        weight = np.concatenate((np.zeros((len(start), 1)), weight), axis=1)
+
+        # Distribui o orçamento (1 NaN entre ramos) pelo peso total de cada ramo
+        budget = self.points - len(start)
+        share = np.maximum(2, np.floor(budget * weight[:, -1] / weight[:, -1].sum())).astype(int)
+        while share.sum() > budget and share.max() > 2:
+            share[share.argmax()] -= 1
+
+        pos = 0
+        for u_pilot, w, n in zip(pilot, weight, share):
+            if pos + n > self.points:
+                break
+            u = np.interp(np.linspace(0, w[-1], n), w, u_pilot)
+            x[pos:pos + n] = (u - b_3) / b_2
+            y[pos:pos + n] = b_0 + b_1 * self.func(u)
+            pos += n + 1  # Deixa um NaN para quebrar a linha no polo
+
+        if b_2 < 0:
+            # x decresce com u: inverte para o traço ficar da esquerda para a direita
+            x[:pos - 1], y[:pos - 1] = x[:pos - 1][::-1].copy(), y[:pos - 1][::-1].copy()
+        return x, y
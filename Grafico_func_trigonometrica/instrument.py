@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+#####################################
+# Instrumentação por frame (substitui o print(animation_step))
+#
+# Cada etapa de cada frame vira um registro (etapa, frame, inicio, fim, bytes):
+#   compute : update escolhendo/calculando a linha do frame
+#   draw    : desenho da figura (savefig/canvas.draw)
+#   encode  : writer codificando o frame (bytes = bytes escritos)
+#
+# Sinks: SummarySink (resumo em memória), ChromeTraceSink (.json para chrome://tracing
+# ou Perfetto) e CSVSink (.csv). Desligado (active() is None) o custo é só um "if".
+#
+# Uso: with tracing('summary'): ...      ou      with tracing('trace.json'): ...
+#####################################
+
+STAGES = ('compute', 'draw', 'encode')
+
+_active = None
+
+
+def active():
+    """
+    Tracer ligado no momento (ou None).
+    """
+    return _active
+
+
+class SummarySink:
+    """
+    Guarda as durações em memória e monta um resumo por etapa (total, média, p50, p95, max).
+    """
+
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+        self.durations = {}
+        self.bytes = {}
+
+    def add(self, stage, frame, start, end, nbytes, pid, args):
+        self.durations.setdefault(stage, []).append(end - start)
+        self.bytes[stage] = self.bytes.get(stage, 0) + nbytes
+
+    def summary(self):
+        result = {}
+        for stage, values in self.durations.items():
+            ordered = sorted(values)
+            result[stage] = {
+                'frames': len(ordered),
+                'total_s': sum(ordered),
+                'mean_ms': 1000 * sum(ordered) / len(ordered),
+                'p50_ms': 1000 * ordered[len(ordered) // 2],
+                'p95_ms': 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max_ms': 1000 * ordered[-1],
+                'bytes': self.bytes[stage],
+            }
+        return result
+
+    def close(self):
+        if not self.verbose:
+            return
+        for stage, s in self.summary().items():
+            print(f"{stage:<8} {s['frames']:6d} frames  total {s['total_s']:8.3f}s  média {s['mean_ms']:7.2f}ms  "
+                  f"p95 {s['p95_ms']:7.2f}ms  max {s['max_ms']:7.2f}ms  {s['bytes']} bytes")
+
+
+class ChromeTraceSink:
+    """
+    Arquivo JSON no formato Trace Event (abre no chrome://tracing e no ui.perfetto.dev).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.events = []
+
+    def add(self, stage, frame, start, end, nbytes, pid, args):
+        self.events.append({
+            'name': stage,
+            'cat': 'frame',
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': os.getpid(),
+            'tid': pid,
+            'args': {'frame': frame, 'bytes': nbytes, **args},
+        })
+
+    def close(self):
+        with open(self.path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+class CSVSink:
+    """
+    Uma linha por registro, escrita na hora (não acumula na memória).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['stage', 'frame', 'start_s', 'duration_ms', 'bytes', 'pid'])
+
+    def add(self, stage, frame, start, end, nbytes, pid, args):
+        self._writer.writerow([stage, frame, f'{start:.6f}', f'{(end - start) * 1000:.4f}', nbytes, pid])
+
+    def close(self):
+        self._file.close()
+
+
+class Tracer:
+    """
+    Repassa cada registro para os sinks. Seguro para usar de várias threads.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, frame: int, start: float, end: float, nbytes: int = 0, pid: int = None, **args):
+        """
+        Registra uma etapa já medida (start/end de time.perf_counter()).
+        """
+        pid = os.getpid() if pid is None else pid
+        with self._lock:
+            for sink in self.sinks:
+                sink.add(stage, frame, start, end, nbytes, pid, args)
+
+    @contextmanager
+    def span(self, stage: str, frame: int, **args):
+        start = time.perf_counter()
+        yield
+        self.record(stage, frame, start, time.perf_counter(), **args)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def sink_from_spec(spec: str):
+    """
+    'summary' -> SummarySink, '*.json' -> ChromeTraceSink, '*.csv' -> CSVSink
+    """
+    if spec == 'summary':
+        return SummarySink()
+    if spec.endswith('.json'):
+        return ChromeTraceSink(spec)
+    if spec.endswith('.csv'):
+        return CSVSink(spec)
+    raise ValueError(f'Sink de trace desconhecido: {spec}')
+
+
+@contextmanager
+def tracing(*specs):
+    """
+    Liga o tracer enquanto o bloco roda. Sem specs (ou só '') não faz nada.
+    Aceita sinks prontos ou specs em texto ('summary', 'trace.json', 'trace.csv').
+    """
+    global _active
+    sinks = [sink_from_spec(s) if isinstance(s, str) else s for s in specs if s]
+    if not sinks:
+        yield None
+        return
+    previous, _active = _active, Tracer(*sinks)
+    try:
+        yield _active
+    finally:
+        tracer, _active = _active, previous
+        tracer.close()
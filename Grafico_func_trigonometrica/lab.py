@@ -1,8 +1,9 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.animation import FuncAnimation, PillowWriter
-from subprocess import run #type:ignore
-from IPython.display import Image, clear_output
+import os
+import sys
+from io import BytesIO
+from engine import POLE_FUNCTIONS, FrameTensor, PoleFrames, decimate_minmax, decimate_x, viewport_domain
+from instrument import active, tracing
 
 #####################################
 # b_0 - Deslocamento Vertical
@@ -19,6 +20,10 @@ from IPython.display import Image, clear_output
 
 global animation_frame, x_signal
 
+# matplotlib.pyplot, IPython e subprocess só são importados quando usados (pyplot(), in_notebook(),
+# clear_screen()), então o menu aparece sem esperar por eles. Para ver o tempo de import:
+#   python bench.py --imports
+
 ###############################################################################
 ###############################################################################
 ###     PARA ALTERAR A ANIMAÇÃO, MUDE O VALOR DAS CONSTANTES ABAIXO:        ###         
@@ -29,17 +34,35 @@ global animation_frame, x_signal
 # Constantes da animação
 MIN_FRAMES = 1          # Minimo 1, deve ser menor que MAX_FRAMES
 MAX_FRAMES = 150        # Quanto maior, mais tempo a animação 
-INTERVAL = 25           # intervalo de atualização de um frame a outro (Recomendado: Max 50)
+INTERVAL = 25           # intervalo (ms) entre redesenhos da janela; o frame mostrado vem do relógio (timeline.py), a velocidade é a mesma do arquivo
 FRAME_DIV = 10          # FRAME_DIV deve ser superior a 0, diminui a velocidade da animação que usa o frame para mudar o valor (Melhor performance)
+FPS = 20                # Frames por segundo do arquivo exportado (os parâmetros andam FPS / FRAME_DIV por segundo)
+DURATION = None         # Duração da animação em segundos (None = (MAX_FRAMES - MIN_FRAMES) / FPS)
+OUTPUT_FORMAT = 'gif'   # gif, mp4, webm ou apng (mp4/webm/apng precisam do ffmpeg instalado)
+SAVE_FILE = False       # Também grava animation.{OUTPUT_FORMAT} em disco (por padrão a animação fica só na memória)
+STREAM_WRITER = True    # Escreve cada frame direto no arquivo (writers.py), sem guardar todos na memória
+RASTER = False          # Desenha a linha direto com NumPy sobre o fundo pronto (raster.py), sem o matplotlib por frame
+WORKERS = 1             # Processos usados para desenhar os frames do GIF (1 = serial pelo ani.save)
+CHECKPOINT = False      # Salva os frames prontos em blocos (checkpoint.py): uma exportação interrompida continua de onde parou
+USE_CACHE = True        # Reaproveita GIFs já gerados com as mesmas entradas (cache.py)
+TRACE = ''              # '' desligado, 'summary' (resumo no terminal) ou arquivo 'trace.json' (Perfetto) / 'trace.csv'
 AUX_DIV = 5             # No caso da tangente o gráfico pode ficar bem inviável para a visualização então vamos adicionar uma variavel extra para controle
 
 
 PI,SEN,COS,TG = np.pi, np.sin, np.cos, np.tan # declarando as constantes trigonométricas
+CHARTS = {1: ('Sen', SEN), 2: ('Cos', COS), 3: ('Tg', TG)}  # Nome e função de cada gráfico do menu
 
 SLICES = 5000           # Não aumentar
 
 FIG_X_SIZE = 10         # tamanho do gráfico plotado
 FIG_Y_SIZE = 5          # tamanho do gráfico plotado
+DPI = 100               # pixels por polegada da figura (FIG_X_SIZE * DPI = largura em pixels)
+
+VIEWPORT_SAMPLING = True  # Calcula só a parte visivel do eixo X, com pontos pela largura em pixels (ignora SLICES e LINSPACE)
+SAMPLES_PER_PIXEL = 2     # Pontos por coluna de pixel. Acima de 2 usa decimação min/max (picos exatos)
+ADAPTIVE_POLES = True     # Tangente: quebra a linha nos polos e amostra só o que aparece (sem linhas verticais falsas)
+POLE_POINTS = 800         # Pontos por frame da amostragem adaptativa
+FLOAT32 = False           # Calcula os frames em float32 (metade da memória, precisão suficiente para o desenho)
 
 MIN_LINSPACE = -10 * PI # Inicio do domínio
 MAX_LINSPACE = 10 * PI  # Final do domínio
@@ -87,13 +110,63 @@ def ask_input(msg: str, input_msg: str, error_msg: str, input_range: list, mult_
             print("Entrada inválida. Por favor, digite um número inteiro.")
 
 
+def chart_domain():
+    """
+    Domínio calculado em cada frame. Com VIEWPORT_SAMPLING só a parte visivel do eixo X
+    (MIN_X_LIM..MAX_X_LIM mais uma margem), com pontos pela largura da figura em pixels.
+    """
+    if VIEWPORT_SAMPLING:
+        return viewport_domain(MIN_X_LIM, MAX_X_LIM, FIG_X_SIZE * DPI, SAMPLES_PER_PIXEL)
+    return np.linspace(MIN_LINSPACE, MAX_LINSPACE, SLICES)
+
+
+def chart_columns(x):
+    """
+    Colunas de pixels para a decimação min/max do domínio x (None = desenha todos os pontos)
+    """
+    if VIEWPORT_SAMPLING and SAMPLES_PER_PIXEL > 2:
+        return len(x) // SAMPLES_PER_PIXEL
+    return None
+
+
+_plt = None
+
+
+def headless():
+    """
+    True quando não há tela para abrir janelas (Linux sem DISPLAY/WAYLAND_DISPLAY) e nenhum
+    backend foi escolhido (MPLBACKEND) nem há um notebook rodando.
+    """
+    if os.environ.get('MPLBACKEND') or sys.platform in ('win32', 'darwin') or in_notebook():
+        return False
+    return not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def pyplot():
+    """
+    matplotlib.pyplot, importado no primeiro uso. Sem tela usa o backend Agg.
+    """
+    global _plt
+    if _plt is None:
+        import matplotlib
+        if headless():
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as _plt
+    return _plt
+
+
 def chart_config():
     # Configuração inicial do gráfico
-    fig, ax = plt.subplots(figsize=(FIG_X_SIZE, FIG_Y_SIZE))
-    x = np.linspace(MIN_LINSPACE, MAX_LINSPACE, SLICES)  # Domínio
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(FIG_X_SIZE, FIG_Y_SIZE), dpi=DPI)
+    x = chart_domain()  # Domínio
+    columns = chart_columns(x)
 
     # Criação da linha inicial no gráfico
-    line, = ax.plot(x, SEN(x))
+    if columns is None:
+        line, = ax.plot(x, SEN(x))
+    else:
+        line, = ax.plot(decimate_x(x, columns), decimate_minmax(SEN(x), columns))
 
     # Configuração dos limites do gráfico
     ax.set_xlim(MIN_X_LIM, MAX_X_LIM)
@@ -127,110 +200,253 @@ def label_chart(chart_name: str, opt: list):
     return label_selected
 
 
-def plot_sin_dynamic(opt, animation_type):
+def chart_title(chart_opt: int, opt: list, animation_type: int):
     """
-    Plota um gráfico dinâmico do seno, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
+    Titulo completo do gráfico (funções + sinal da animação)
     """
+    signal = 'positivo' if animation_type > 0 else 'negativo'
+    return f'{label_chart(CHARTS[chart_opt][0], opt)} {signal}'
+
+
+def save_animation(ani, chart_opt: int, opt: list, animation_type: int, filename):
+    """
+    Exporta a animação (GIF, MP4, WebM ou APNG pela extensão do filename).
+    filename pode ser um BytesIO com .name (ex: 'animation.gif') para ficar só na memória.
+    Com RASTER a linha é rasterizada com NumPy (raster.py); com WORKERS > 1 os frames
+    são desenhados em paralelo (render.py). Com CHECKPOINT os frames são salvos em blocos
+    e uma exportação interrompida continua do último bloco pronto (checkpoint.py).
+    Com USE_CACHE uma animação igual a uma já gerada é copiada do cache (cache.py).
+    """
+    def render(path):
+        # O frame 0 já desenhado ao montar a FuncAnimation (fora do tracing) não pode ser
+        # pulado pelo atalho do update, senão o trace do ani.save fica sem o compute dele
+        ani.shown[0] = None
+        if CHECKPOINT:
+            from checkpoint import save_checkpointed
+            save_checkpointed(chart_opt, opt, animation_type, path, fps=FPS, workers=WORKERS)
+        elif RASTER:
+            from raster import save_raster
+            save_raster(chart_opt, opt, animation_type, path, fps=FPS)
+        elif WORKERS > 1:
+            from render import save_parallel
+            save_parallel(chart_opt, opt, animation_type, path, fps=FPS, workers=WORKERS)
+        elif STREAM_WRITER or is_file(path):  # O PillowWriter só escreve em caminho
+            ani.save(path, writer=writer_for(path, FPS))
+        else:
+            from matplotlib.animation import PillowWriter
+            ani.save(path, writer=PillowWriter(fps=FPS))
+
+    from writers import is_file, output_format, writer_for
+    if not USE_CACHE:
+        return render(filename)
+    from cache import cached_render
+    fmt = output_format(filename)
+    cached_render(animation_key(chart_opt, opt, animation_type, fmt), filename, render, fmt)
+
+
+def animation_key(chart_opt: int, opt: list, animation_type: int, fmt: str = 'gif'):
+    """
+    Hash (cache.py) de tudo que muda o arquivo exportado: constantes do render.py mais
+    STREAM_WRITER e RASTER. Usado pelo cache do save_animation e pelo .key do batch.py.
+    """
+    from cache import cache_key
+    from render import lab_constants
+    return cache_key(chart_opt, opt, animation_type, {**lab_constants(), 'STREAM_WRITER': STREAM_WRITER, 'RASTER': RASTER}, fmt)
+
+
+def chart_timeline(opt: list, animation_type: int):
+    """
+    Animação pelo tempo (timeline.py): DURATION segundos com os parâmetros de opt
+    andando ±FPS / FRAME_DIV por segundo (o mesmo animation_step de antes no arquivo).
+    """
+    from timeline import frame_timeline
+    return frame_timeline(opt, animation_type, MIN_FRAMES, MAX_FRAMES, FRAME_DIV, FPS, DURATION)
+
+
+def frame_count():
+    """
+    Quantidade de frames exportados (DURATION * FPS).
+    """
+    return len(chart_timeline([], 1).times(FPS))
 
-    # Função de atualização para animação
-    def update(frame):
-        global animation_frame, x_signal
-        animation_frame = frame
-        possible_frame = {
-            0: -1*(frame / FRAME_DIV),
-            1: (frame / FRAME_DIV)}
-        animation_step = possible_frame[animation_type]
-        print(animation_step)
-        x_signal = 'positivo' if animation_type > 0 else 'negativo'
-        b_0 = animation_step if 1 in opt else 0
-        b_1 = animation_step if 2 in opt else 1
-        b_2 = animation_step if 3 in opt else 1
-        b_3 = animation_step if 4 in opt else 0
-        y = b_0 + (b_1 * SEN((b_2 * x) + b_3))  # SENO  a * sen((b*x)*c)+d
-        line.set_ydata(y)
-        return line,
 
+def chart_frames(chart_opt: int, opt: list, animation_type: int, x, timeline=None):
+    """
+    Frames da animação (FrameTensor), amostrados nos instantes k / FPS da timeline
+    (padrão: chart_timeline). Com ADAPTIVE_POLES a tangente usa PoleFrames,
+    que quebra a linha nos polos e espalha POLE_POINTS pontos pela curva visivel.
+    """
+    func = CHARTS[chart_opt][1]
+    timeline = timeline or chart_timeline(opt, animation_type)
+    times = timeline.times(FPS)
+    params = timeline.params(times)
+    steps = params[opt[0] - 1] if opt else times  # Valor do parâmetro animado (o animation_step) no trace
+    if ADAPTIVE_POLES and func in POLE_FUNCTIONS:
+        return PoleFrames(func, params, (MIN_X_LIM, MAX_X_LIM), (MIN_Y_LIM, MAX_Y_LIM),
+                          (FIG_X_SIZE * DPI, FIG_Y_SIZE * DPI), POLE_POINTS, steps=steps)
+    return FrameTensor(func, x, params, steps=steps, columns=chart_columns(x),
+                       dtype=np.float32 if FLOAT32 else np.float64)
+
+
+def build_animation(chart_opt: int, opt: list, animation_type: int, realtime: bool = False):
+    """
+    Monta a figura e a FuncAnimation da função escolhida (1 - Seno, 2 - Cosseno, 3 - Tangente),
+    sem mostrar nem salvar. Com realtime (janela ao vivo) o frame vem do relógio e frames
+    são pulados se o desenho atrasar; sem realtime (exportação) todos os frames saem em ordem.
+    """
+    global x_signal
+    from matplotlib.animation import FuncAnimation
+    from timeline import realtime_frames
     line,fig,x = chart_config()
+    y_frames = chart_frames(chart_opt, opt, animation_type, x)  # a * f((b*x)*c)+d
+    frames = realtime_frames(len(y_frames), FPS) if realtime else range(len(y_frames))
+    x_signal = 'positivo' if animation_type > 0 else 'negativo'
+    shown = [None]
+
+    # Função de atualização para animação (só escolhe a linha já calculada)
+    def update(index):
+        global animation_frame
+        animation_frame = index
+        if index == shown[0]:  # Redesenho antes do próximo frame: nada para calcular
+            return line,
+        shown[0] = index
+        tracer = active()
+        if tracer is None:
+            line.set_data(*y_frames.frame(index))
+        else:
+            with tracer.span('compute', index, step=float(y_frames.steps[index])):
+                line.set_data(*y_frames.frame(index))
+        return line,
 
     # Criação da animação
-    ani = FuncAnimation(fig, update, frames=np.arange(
-        MIN_FRAMES, MAX_FRAMES), interval=INTERVAL, blit=True)
-    label_selected = label_chart('Sen', opt)
-    plt.title(f'{label_selected} {x_signal}')
+    extra = {'cache_frame_data': False, 'save_count': len(y_frames)} if realtime else {}
+    ani = FuncAnimation(fig, update, frames=frames, interval=INTERVAL, blit=True, **extra)
+    ani.shown = shown  # Ultimo frame desenhado (o save_animation zera antes de exportar)
+    fig.axes[0].set_title(chart_title(chart_opt, opt, animation_type))
+    return ani, fig
+
+
+def render_animation(chart_opt: int, opt: list, animation_type: int, filename: str):
+    """
+    Gera o arquivo da animação sem interação (usado pelo modo batch).
+    """
+    ani, fig = build_animation(chart_opt, opt, animation_type)
+    with tracing(TRACE):
+        save_animation(ani, chart_opt, opt, animation_type, filename)
+    pyplot().close(fig)
+
+
+def encode_animation(chart_opt: int, opt: list, animation_type: int, fmt: str = None):
+    """
+    Codifica a animação direto na memória e retorna os bytes (nenhum arquivo é criado).
+    """
+    buffer = BytesIO()
+    buffer.name = f'animation.{fmt or OUTPUT_FORMAT}'
+    ani, fig = build_animation(chart_opt, opt, animation_type)
+    with tracing(TRACE):
+        save_animation(ani, chart_opt, opt, animation_type, buffer)
+    pyplot().close(fig)
+    return buffer.getvalue()
+
+
+def in_notebook():
+    """
+    True quando roda num kernel do Jupyter/Colab (o display mostra a animação na célula).
+    """
+    ipython = sys.modules.get('IPython')  # Num notebook o IPython já está carregado
+    if ipython is None:
+        return False
+    shell = ipython.get_ipython()
+    return shell is not None and 'IPKernelApp' in shell.config
+
+
+def preview_animation(data: bytes):
+    """
+    Toca numa janela os frames já codificados (GIF/APNG), sem desenhar o gráfico de novo.
+    O frame mostrado vem do relógio contra a duração de cada frame do arquivo (mesma
+    velocidade do arquivo, pulando frames se atrasar).
+    """
+    from matplotlib.animation import FuncAnimation
+    from PIL import Image as PILImage
+    from timeline import timed_frames
+    plt = pyplot()
+    movie = PILImage.open(BytesIO(data))
+    durations = []  # Duração (s) de cada frame: frames repetidos viram um frame mais longo (writers.py)
+    for index in range(movie.n_frames):
+        movie.seek(index)
+        durations.append((movie.info.get('duration') or 1000 / FPS) / 1000)
+    movie.seek(0)
+    fig = plt.figure(figsize=(movie.width / DPI, movie.height / DPI), dpi=DPI)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    image = ax.imshow(np.asarray(movie.convert('RGB')))
+
+    def update(index):
+        if index != movie.tell():
+            movie.seek(index)
+            image.set_data(np.asarray(movie.convert('RGB')))
+        return image,
+
+    ani = FuncAnimation(fig, update, frames=timed_frames(durations), interval=INTERVAL, blit=True,
+                        cache_frame_data=False, save_count=movie.n_frames)
     plt.show()
-    ani.save('animation.gif', writer=PillowWriter(fps=20))
-    Image(filename='animation.gif')
     plt.close(fig)
+    return ani
 
 
-def plot_cos_dynamic(opt, animation_type):
+def plot_dynamic(chart_opt: int, opt: list, animation_type: int):
+    """
+    Plota um gráfico dinâmico da função escolhida (1 - Seno, 2 - Cosseno, 3 - Tangente),
+    permitindo alterar amplitude, frequência, fase e deslocamento vertical.
+    Os frames são desenhados uma vez só: a animação é codificada na memória e a mesma
+    sequência vai para o display (notebook) ou para a janela. Com SAVE_FILE também vai para o disco.
+    """
+    data = encode_animation(chart_opt, opt, animation_type)
+    if SAVE_FILE:
+        with open(f'animation.{OUTPUT_FORMAT}', 'wb') as f:
+            f.write(data)
+    if in_notebook():
+        from IPython.display import Image, Video, display
+        if OUTPUT_FORMAT in ('gif', 'apng'):
+            display(Image(data=data, format='png' if OUTPUT_FORMAT == 'apng' else 'gif'))
+        else:
+            display(Video(data, embed=True, mimetype=f'video/{OUTPUT_FORMAT}'))
+    elif OUTPUT_FORMAT in ('gif', 'apng'):
+        preview_animation(data)
+    else:
+        # MP4/WebM não são lidos pelo Pillow: a janela desenha a animação de novo
+        ani, fig = build_animation(chart_opt, opt, animation_type, realtime=True)
+        pyplot().show()
+        pyplot().close(fig)
+
+
+def plot_sin_dynamic(opt, animation_type):
     """
     Plota um gráfico dinâmico do seno, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
     """
-    # Função de atualização para animação
-    def update(frame):
-        global animation_frame, x_signal
-        animation_frame = frame
-        possible_frame = {
-            0: -1*(frame / FRAME_DIV),
-            1: (frame / FRAME_DIV)}
-        animation_step = possible_frame[animation_type]
-        print(animation_step)
-        x_signal = 'positivo' if animation_type > 0 else 'negativo'
-        b_0 = animation_step if 1 in opt else 0
-        b_1 = animation_step if 2 in opt else 1
-        b_2 = animation_step if 3 in opt else 1
-        b_3 = animation_step if 4 in opt else 0
-        y = b_0 + (b_1 * COS((b_2 * x) + b_3))  # COSSENO  a * cos((b*x)*c)+d
-        line.set_ydata(y)
-        return line,
+    plot_dynamic(1, opt, animation_type)
 
-    line,fig,x = chart_config()
 
-    # Criação da animação
-    ani = FuncAnimation(fig, update, frames=np.arange(
-        MIN_FRAMES, MAX_FRAMES), interval=INTERVAL, blit=True)
-    label_selected = label_chart('Cos', opt)
-    plt.title(f'{label_selected} {x_signal}')
-    plt.show()
-    ani.save('animation.gif', writer=PillowWriter(fps=20))
-    Image(filename='animation.gif')
-    plt.close(fig)
+def plot_cos_dynamic(opt, animation_type):
+    """
+    Plota um gráfico dinâmico do cosseno, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
+    """
+    plot_dynamic(2, opt, animation_type)
 
 
 def plot_tg_dynamic(opt, animation_type):
     """
-    Plota um gráfico dinâmico do seno, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
+    Plota um gráfico dinâmico da tangente, permitindo alterar amplitude, frequência, fase e deslocamento vertical.
     """
-    # Função de atualização para animação
-    def update(frame):
-        global animation_frame, x_signal
-        animation_frame = frame
-        possible_frame = {
-            0: -1*(frame / FRAME_DIV),
-            1: (frame / FRAME_DIV)}
-        animation_step = possible_frame[animation_type]
-        print(animation_step)
-        x_signal = 'positivo' if animation_type > 0 else 'negativo'
-        b_0 = animation_step if 1 in opt else 0
-        b_1 = animation_step if 2 in opt else 1
-        b_2 = animation_step if 3 in opt else 1
-        b_3 = animation_step if 4 in opt else 0
-        y = b_0 + (b_1 * TG((b_2 * x) + b_3)) # TANGENTE  a * tg((b*x)*c)+d
-        line.set_ydata(y)
-        return line,
+    plot_dynamic(3, opt, animation_type)
 
-    line,fig,x = chart_config()
 
-    # Criação da animação
-    ani = FuncAnimation(fig, update, frames=np.arange(
-        MIN_FRAMES, MAX_FRAMES), interval=INTERVAL, blit=True)
-    label_selected = label_chart('Tg', opt)
-    plt.title(f'{label_selected} {x_signal}')
-    plt.show()
-    ani.save('animation.gif', writer=PillowWriter(fps=20))
-    Image(filename='animation.gif')
-    plt.close(fig)
+def clear_screen():
+    """
+    Limpa o terminal (cls no Windows, clear no Linux/Mac)
+    """
+    from subprocess import run
+    run(['cmd', '/c', 'cls'] if os.name == 'nt' else ['clear'])
 
 
 def select_chart():
@@ -251,7 +467,7 @@ def main():
     chart_names = ['Sen', 'Cos', 'Tg']
     while True:
         selected_chart,chart_opt = select_chart()
-        run(['cmd', '/c', 'cls'])
+        clear_screen()
 
         animation_type = ask_input(
             'Valores Positivos ou Negativos?',
@@ -266,7 +482,7 @@ def main():
         [1, 2, 3, 4],
         True
     )
-        run(['cmd', '/c', 'cls'])
+        clear_screen()
         selected_chart(opt, animation_type)
 
 
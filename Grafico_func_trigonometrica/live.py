@@ -0,0 +1,186 @@
+import sys
+import time
+
+import numpy as np
+
+import lab
+from engine import NEUTRAL, POLE_FUNCTIONS, PoleFrames, decimate_minmax, decimate_x, eval_frame
+
+#####################################
+# Modo ao vivo: sliders para b_0..b_3 e botões para a função
+#
+# Cada mudança recalcula só a linha (kernel com buffers já alocados, sem animação) e
+# redesenha com blit: o fundo (eixos, ticks) é guardado uma vez e só a linha, o titulo
+# e o widget mexido são desenhados por cima. O fundo é guardado de novo a cada desenho
+# completo (ex: janela redimensionada) e depois de desenhar o widget mexido (senão os
+# widgets mexidos antes voltariam ao visual antigo no próximo restore).
+# Desenhar texto é a parte mais cara do Agg, então o titulo (label_chart dos parâmetros
+# fora do valor neutro) é desenhado uma vez por texto e depois só copiado (cache de pixels).
+#
+# Uso: python live.py
+#####################################
+
+# Faixa e valor inicial de cada slider (b_0..b_3)
+RANGES = (
+    ('b_0', -20.0, 20.0, 0.0),
+    ('b_1', -10.0, 10.0, 1.0),
+    ('b_2', 0.0, 5.0, 1.0),
+    ('b_3', -2 * np.pi, 2 * np.pi, 0.0),
+)
+LATENCY_WINDOW = 200    # Últimas medições usadas no resumo de latência
+
+
+class LineKernel:
+    """
+    Calcula y = b_0 + b_1 * f(b_2 * x + b_3) de um frame só, sempre no mesmo buffer.
+    Tangente com ADAPTIVE_POLES usa o PoleFrames (quebra nos polos) com um frame só.
+    """
+
+    def __init__(self, chart_opt: int):
+        self.func = lab.CHARTS[chart_opt][1]
+        self.x = lab.chart_domain()
+        self.columns = lab.chart_columns(self.x)
+        self.x_plot = self.x if self.columns is None else decimate_x(self.x, self.columns)
+        self._out = np.empty_like(self.x)
+        self._last = None
+        self._poles = None
+        if lab.ADAPTIVE_POLES and self.func in POLE_FUNCTIONS:
+            self._poles = PoleFrames(self.func, [[b] for b in NEUTRAL], (lab.MIN_X_LIM, lab.MAX_X_LIM),
+                                     (lab.MIN_Y_LIM, lab.MAX_Y_LIM),
+                                     (lab.FIG_X_SIZE * lab.DPI, lab.FIG_Y_SIZE * lab.DPI), lab.POLE_POINTS)
+
+    def __call__(self, b_0: float, b_1: float, b_2: float, b_3: float):
+        """
+        (x, y) da linha. Parâmetros iguais aos da última chamada não recalculam nada.
+        """
+        params = (b_0, b_1, b_2, b_3)
+        if params == self._last:
+            return self._result
+        if self._poles is not None:
+            self._poles.params = tuple(np.array([b]) for b in params)
+            self._result = self._poles.frame(0)
+        else:
+            y = eval_frame(self.func, self.x, b_0, b_1, b_2, b_3, self._out)
+            self._result = self.x_plot, (y if self.columns is None else decimate_minmax(y, self.columns))
+        self._last = params
+        return self._result
+
+
+class LiveTuner:
+    """
+    Figura do chart_config com sliders (b_0..b_3) e botões (Sen, Cos, Tg), redesenhada com blit.
+    """
+
+    def __init__(self, chart_opt: int = 1):
+        from matplotlib.widgets import RadioButtons, Slider
+
+        self.line, self.fig, _ = lab.chart_config()
+        self.ax = self.fig.axes[0]
+        self.fig.subplots_adjust(left=0.2, bottom=0.35)
+        self.title = self.ax.set_title('')
+        self.line.set_animated(True)
+        self.title.set_animated(True)
+
+        self.sliders = []
+        for i, (name, low, high, start) in enumerate(RANGES):
+            slider = Slider(self.fig.add_axes((0.25, 0.22 - 0.05 * i, 0.6, 0.03)), name, low, high, valinit=start,
+                            valfmt='%.2f')  # Texto simples: o formato padrão passa pelo mathtext (lento)
+            slider.drawon = False  # O desenho é feito pelo blit em refresh
+            slider.on_changed(lambda _, ax=slider.ax: self.refresh(ax))
+            self.sliders.append(slider)
+        self.radio = RadioButtons(self.fig.add_axes((0.02, 0.4, 0.1, 0.2)), [name for name, _ in lab.CHARTS.values()],
+                                  active=chart_opt - 1)
+        self.radio.drawon = False
+        self.radio.on_clicked(self.select)
+
+        self.kernels = {}
+        self.chart_opt = chart_opt
+        self.background = None
+        self._titles = {}   # texto do titulo -> pixels já desenhados
+        self.latencies = []
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def kernel(self):
+        if self.chart_opt not in self.kernels:
+            self.kernels[self.chart_opt] = LineKernel(self.chart_opt)
+        return self.kernels[self.chart_opt]
+
+    def select(self, label: str):
+        self.chart_opt = next(k for k, (name, _) in lab.CHARTS.items() if name == label)
+        self.refresh(self.radio.ax)
+
+    def update_artists(self):
+        values = [s.val for s in self.sliders]
+        self.line.set_data(*self.kernel()(*values))
+        opt = [i + 1 for i, v in enumerate(values) if v != NEUTRAL[i]]
+        name = lab.CHARTS[self.chart_opt][0]
+        self.title.set_text(lab.label_chart(name, opt) if opt else name)
+
+    def draw_title(self):
+        """
+        Desenha o titulo. Um texto já desenhado antes é só copiado de volta (sem o Agg).
+        """
+        canvas = self.fig.canvas
+        region = self._titles.get(self.title.get_text())
+        if region is not None:
+            return canvas.restore_region(region)
+        self.ax.draw_artist(self.title)
+        bbox = self.title.get_window_extent().expanded(1.05, 1.2)
+        self._titles[self.title.get_text()] = canvas.copy_from_bbox(bbox)
+
+    def on_draw(self, event):
+        """
+        Desenho completo (inicio ou janela redimensionada): guarda o fundo sem as partes animadas.
+        """
+        canvas = self.fig.canvas
+        self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self._titles.clear()
+        self.update_artists()
+        self.draw_title()
+        self.ax.draw_artist(self.line)
+
+    def refresh(self, widget_ax=None):
+        """
+        Recalcula a linha e redesenha só o que mudou por cima do fundo guardado.
+        """
+        if self.background is None:
+            return
+        start = time.perf_counter()
+        canvas = self.fig.canvas
+        self.update_artists()
+        canvas.restore_region(self.background)
+        if widget_ax is not None:
+            self.fig.draw_artist(widget_ax)
+            self.background = canvas.copy_from_bbox(self.fig.bbox)  # Fundo com o widget novo
+        self.draw_title()
+        self.ax.draw_artist(self.line)
+        canvas.blit(self.fig.bbox)
+        self.latencies.append(time.perf_counter() - start)
+        del self.latencies[:-LATENCY_WINDOW]
+
+    def latency_ms(self):
+        """
+        p50/p95/max (ms) do recalculo + blit das últimas mudanças.
+        """
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+        return {'p50': 1000 * ordered[len(ordered) // 2],
+                'p95': 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max': 1000 * ordered[-1]}
+
+    def show(self):
+        lab.pyplot().show()
+        summary = self.latency_ms()
+        if summary:
+            print(f"Latência do redesenho: p50 {summary['p50']:.2f}ms  p95 {summary['p95']:.2f}ms  max {summary['max']:.2f}ms")
+
+
+def main(argv=None):
+    chart_opt = int((argv or sys.argv[1:] or ['1'])[0])
+    LiveTuner(chart_opt).show()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import numpy as np
+from matplotlib.colors import to_rgb
+
+#####################################
+# Backend rápido: rasterização direta com NumPy
+#
+# O fundo estático (eixos, spines, ticks, titulo) é desenhado pelo matplotlib uma vez só
+# em uma imagem uint8. Em cada frame a linha é rasterizada direto numa cópia desse fundo:
+# os segmentos são recortados na área do gráfico (Liang-Barsky), amostrados a cada
+# STEP pixels e espalhados nos pixels vizinhos (bilinear) para ter antialiasing.
+# Tudo vetorizado, sem passar pelos artists/Agg por frame.
+#####################################
+
+STEP = 1.0      # Distância (pixels) entre as amostras ao longo da linha
+
+
+def clip_segments(x0, y0, x1, y1, box):
+    """
+    Recorta os segmentos (x0, y0)-(x1, y1) no retângulo box = (xmin, ymin, xmax, ymax).
+    Liang-Barsky vetorizado: retorna os segmentos recortados e a máscara dos que sobram.
+    """
+    dx, dy = x1 - x0, y1 - y0
+    t0 = np.zeros_like(x0)
+    t1 = np.ones_like(x0)
+    keep = np.isfinite(x0) & np.isfinite(y0) & np.isfinite(x1) & np.isfinite(y1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p, q in ((-dx, x0 - box[0]), (dx, box[2] - x0), (-dy, y0 - box[1]), (dy, box[3] - y0)):
+            parallel = p == 0
+            keep &= ~(parallel & (q < 0))
+            r = q / p
+            t0 = np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+            t1 = np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+    keep &= t0 <= t1
+    x0, y0, dx, dy, t0, t1 = (v[keep] for v in (x0, y0, dx, dy, t0, t1))
+    return x0 + t0 * dx, y0 + t0 * dy, x0 + t1 * dx, y0 + t1 * dy
+
+
+def line_coverage(px, py, shape, box, width: float):
+    """
+    Cobertura (0..1) da polilinha em pixels. Retorna (indices planos, cobertura) só dos
+    pixels tocados. px/py em coordenadas de imagem (linha 0 no topo).
+    """
+    height, img_width = shape
+    x0, y0, x1, y1 = clip_segments(px[:-1], py[:-1], px[1:], py[1:], box)
+    if not len(x0):
+        return np.empty(0, dtype=np.intp), np.empty(0)
+
+    dx, dy = x1 - x0, y1 - y0
+    length = np.hypot(dx, dy)
+    count = np.ceil(length / STEP).astype(np.intp) + 1
+    seg = np.repeat(np.arange(len(x0)), count)
+    local = np.arange(len(seg)) - np.repeat(np.cumsum(count) - count, count)
+    t = local / np.maximum(count - 1, 1)[seg]
+    sx = x0[seg] + t * dx[seg]
+    sy = y0[seg] + t * dy[seg]
+
+    # Linhas paralelas ao longo da normal dão a espessura da linha
+    with np.errstate(invalid='ignore', divide='ignore'):
+        nx = np.where(length > 0, -dy / length, 0)[seg]
+        ny = np.where(length > 0, dx / length, 0)[seg]
+    passes = max(1, int(np.ceil(width / STEP)))
+    offsets = (np.arange(passes) - (passes - 1) / 2) * (width / passes)
+    sx = (sx[None, :] + offsets[:, None] * nx).ravel() - 0.5
+    sy = (sy[None, :] + offsets[:, None] * ny).ravel() - 0.5
+    # Cada amostra representa uma área de STEP x (width / passes) pixels
+    area = (length / np.maximum(count - 1, 1))[seg]
+    area = np.tile(area * (width / passes), passes)
+
+    # Espalhamento bilinear nos 4 pixels vizinhos
+    ix, iy = np.floor(sx).astype(np.intp), np.floor(sy).astype(np.intp)
+    fx, fy = sx - ix, sy - iy
+    idx, weight = [], []
+    for ox, oy, w in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)), (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+        cx, cy = ix + ox, iy + oy
+        ok = (cx >= 0) & (cx < img_width) & (cy >= 0) & (cy < height)
+        idx.append(cy[ok] * img_width + cx[ok])
+        weight.append((w * area)[ok])
+    coverage = np.bincount(np.concatenate(idx), weights=np.concatenate(weight), minlength=height * img_width)
+    touched = np.flatnonzero(coverage)
+    return touched, np.minimum(coverage[touched], 1.0)
+
+
+class Rasterizer:
+    """
+    Guarda o fundo da figura e a transformação dados -> pixels de um eixo.
+    render(x, y) devolve o frame RGBA (uint8) com a linha desenhada.
+    """
+
+    def __init__(self, fig, line):
+        ax = line.axes
+        visible = line.get_visible()
+        line.set_visible(False)
+        fig.canvas.draw()
+        self.background = np.asarray(fig.canvas.buffer_rgba()).copy()
+        line.set_visible(visible)
+
+        self.height = self.background.shape[0]
+        self.transform = ax.transData
+        self.color = np.array(to_rgb(line.get_color())) * 255
+        self.width = line.get_linewidth() * fig.dpi / 72  # pontos -> pixels
+        bbox = ax.bbox  # Área do gráfico em pixels (origem embaixo)
+        self.box = (bbox.x0, self.height - bbox.y1, bbox.x1, self.height - bbox.y0)
+        self._frame = np.empty_like(self.background)
+
+    def render(self, x, y):
+        pts = self.transform.transform(np.column_stack((x, y)))
+        px, py = pts[:, 0], self.height - pts[:, 1]
+        idx, alpha = line_coverage(px, py, self.background.shape[:2], self.box, self.width)
+        np.copyto(self._frame, self.background)
+        flat = self._frame.reshape(-1, 4)
+        rgb = flat[idx, :3].astype(np.float64)
+        rgb += alpha[:, None] * (self.color - rgb)
+        flat[idx, :3] = rgb
+        return self._frame
+
+
+def save_raster(chart_opt: int, opt: list, animation_type: int, filename: str, fps: int = 20):
+    """
+    Exporta a animação pelo rasterizador NumPy (sem desenhar a figura por frame).
+    """
+    import matplotlib.pyplot as plt
+    import lab
+    from instrument import active
+    from writers import writer_for
+    import time
+
+    line, fig, x = lab.chart_config()
+    fig.axes[0].set_title(lab.chart_title(chart_opt, opt, animation_type))
+    y_frames = lab.chart_frames(chart_opt, opt, animation_type, x)
+    rasterizer = Rasterizer(fig, line)
+    plt.close(fig)
+
+    tracer = active()
+    with writer_for(filename, fps).opened(filename) as writer:
+        for index in range(len(y_frames)):
+            t0 = time.perf_counter()
+            data = y_frames.frame(index)
+            t1 = time.perf_counter()
+            frame = rasterizer.render(*data)
+            t2 = time.perf_counter()
+            before = writer.bytes_written
+            writer.write_rgba(frame)
+            if tracer is not None:
+                tracer.record('compute', index, t0, t1)
+                tracer.record('draw', index, t1, t2)
+                tracer.record('encode', index, t2, time.perf_counter(), writer.bytes_written - before)
@@ -0,0 +1,124 @@
+import os
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from instrument import active
+
+#####################################
+# Exportação paralela do GIF
+#
+# O intervalo de frames é dividido em blocos e cada processo do pool desenha os seus
+# frames em uma figura Agg própria (montada igual ao chart_config). Os buffers RGBA
+# voltam em ordem para um único encoder (writers.py).
+#####################################
+
+CONSTANTS = ('MIN_FRAMES', 'MAX_FRAMES', 'FRAME_DIV', 'FPS', 'DURATION', 'SLICES', 'FIG_X_SIZE', 'FIG_Y_SIZE', 'DPI',
+             'VIEWPORT_SAMPLING', 'SAMPLES_PER_PIXEL', 'ADAPTIVE_POLES', 'POLE_POINTS', 'FLOAT32',
+             'MIN_LINSPACE', 'MAX_LINSPACE', 'MIN_X_LIM', 'MAX_X_LIM', 'MIN_Y_LIM', 'MAX_Y_LIM',
+             'AUX_DIV')  # AUX_DIV aparece no titulo da tangente (label_chart)
+
+_worker = {}  # Estado de cada processo do pool (figura, linha, frames já calculados)
+
+
+def lab_constants():
+    """
+    Foto das constantes atuais do lab.py, para os processos desenharem com os mesmos valores.
+    """
+    import lab
+    return {name: getattr(lab, name) for name in CONSTANTS}
+
+
+def _init_worker(chart_opt: int, opt: list, animation_type: int, constants: dict):
+    """
+    Monta uma figura Agg por processo e guarda o fundo (eixos, spines, titulo) para o blit.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    setup_figure(chart_opt, opt, animation_type, constants)
+
+
+def setup_figure(chart_opt: int, opt: list, animation_type: int, constants: dict):
+    """
+    Parte do _init_worker que não troca o backend: também serve para desenhar os blocos
+    no próprio processo (ex: checkpoint.py com um processo só, dentro de um pool do batch).
+    """
+    import lab
+
+    for name, value in constants.items():
+        setattr(lab, name, value)
+    line, fig, x = lab.chart_config()
+    fig.axes[0].set_title(lab.chart_title(chart_opt, opt, animation_type))
+    line.set_animated(True)
+    fig.canvas.draw()
+    _worker.update(
+        fig=fig,
+        line=line,
+        background=fig.canvas.copy_from_bbox(fig.bbox),
+        y_frames=lab.chart_frames(chart_opt, opt, animation_type, x),
+    )
+
+
+def _render_chunk(bounds):
+    """
+    Desenha os frames [start, stop) e retorna os buffers RGBA em ordem,
+    junto com os tempos (pid, inicio do calculo, fim do calculo, fim do desenho).
+    """
+    start, stop = bounds
+    fig, line, y_frames = _worker['fig'], _worker['line'], _worker['y_frames']
+    canvas = fig.canvas
+    pid = os.getpid()
+    rendered = []
+    for index in range(start, stop):
+        t0 = time.perf_counter()
+        data = y_frames.frame(index)
+        t1 = time.perf_counter()
+        canvas.restore_region(_worker['background'])
+        line.set_data(*data)
+        fig.axes[0].draw_artist(line)
+        rendered.append((np.asarray(canvas.buffer_rgba()).copy(), (pid, t0, t1, time.perf_counter())))
+    return rendered
+
+
+def render_frames(chart_opt: int, opt: list, animation_type: int, workers: int = None, chunk_size: int = None):
+    """
+    Gera os frames RGBA da animação em ordem, desenhados por um pool de processos.
+    """
+    import lab
+    constants = lab_constants()
+    total = lab.frame_count()
+    workers = min(workers or os.cpu_count() or 1, max(total, 1))
+    if chunk_size is None:
+        chunk_size = max(1, -(-total // (workers * 4)))  # Blocos pequenos para equilibrar a carga
+    chunks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+    with get_context().Pool(workers, initializer=_init_worker,
+                            initargs=(chart_opt, opt, animation_type, constants)) as pool:
+        tracer = active()
+        index = 0
+        for rendered in pool.imap(_render_chunk, chunks):
+            for frame, (pid, t0, t1, t2) in rendered:
+                if tracer is not None:
+                    tracer.record('compute', index, t0, t1, pid=pid)
+                    tracer.record('draw', index, t1, t2, pid=pid)
+                index += 1
+                yield frame
+
+
+def save_parallel(chart_opt: int, opt: list, animation_type: int, filename: str,
+                  fps: int = 20, workers: int = None, chunk_size: int = None):
+    """
+    Exporta a animação desenhando os frames em paralelo. O formato vem da extensão (writers.py).
+    """
+    from writers import writer_for
+
+    tracer = active()
+    with writer_for(filename, fps).opened(filename) as writer:
+        for index, frame in enumerate(render_frames(chart_opt, opt, animation_type, workers, chunk_size)):
+            if tracer is None:
+                writer.write_rgba(frame)
+                continue
+            start, before = time.perf_counter(), writer.bytes_written
+            writer.write_rgba(frame)
+            tracer.record('encode', index, start, time.perf_counter(), writer.bytes_written - before)
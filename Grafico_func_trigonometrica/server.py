@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import parse_qs, urlsplit
+
+#####################################
+# Serviço local de renderização (HTTP + asyncio, só biblioteca padrão)
+#
+#   GET  /render?chart=tg&sign=1&opt=1,3&format=gif&MAX_FRAMES=60
+#   POST /render   {"chart": "tg", "sign": 1, "opt": [1, 3], "format": "gif", "constants": {...}}
+#   GET  /stats    fila, renders em andamento, requisições agrupadas e latência (p50/p95/p99)
+#   GET  /health
+#
+# Cada render roda em um pool de processos limitado (WORKERS). Requisições iguais que chegam
+# enquanto a primeira ainda está renderizando esperam o mesmo resultado (um render só).
+# A resposta são os bytes da animação codificada na memória (nenhum arquivo é criado).
+#
+# Uso: python server.py --port 8765 --workers 4
+#####################################
+
+HOST = '127.0.0.1'
+PORT = 8765
+MAX_QUEUE = 64              # Renders esperando um processo livre; acima disso responde 503
+MAX_REQUEST_FRAMES = 2000   # Limite de frames (DURATION * FPS) aceito numa requisição
+LATENCY_WINDOW = 1000       # Últimas latências usadas nos percentis
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+
+CONTENT_TYPES = {'gif': 'image/gif', 'mp4': 'video/mp4', 'webm': 'video/webm', 'apng': 'image/apng'}
+EXTRA_CONSTANTS = ('RASTER',)  # Além das do render.CONSTANTS
+MAX_PIXELS = 4_000_000      # Limite de (FIG_X_SIZE * DPI) * (FIG_Y_SIZE * DPI) por frame
+
+# Tipo e faixa (inclusiva) aceitos para cada constante da requisição
+CONSTANT_LIMITS = {
+    'MIN_FRAMES': (int, 0, MAX_REQUEST_FRAMES),
+    'MAX_FRAMES': (int, 1, 100_000),
+    'FRAME_DIV': (float, 1e-3, 1e6),
+    'FPS': (float, 1, 120),
+    'DURATION': (float, 0.05, 3600),   # Também aceita null (duração pelos frames)
+    'SLICES': (int, 2, 100_000),
+    'FIG_X_SIZE': (float, 1, 40),
+    'FIG_Y_SIZE': (float, 1, 40),
+    'DPI': (int, 10, 300),
+    'VIEWPORT_SAMPLING': (bool, None, None),
+    'SAMPLES_PER_PIXEL': (int, 1, 16),
+    'ADAPTIVE_POLES': (bool, None, None),
+    'POLE_POINTS': (int, 16, 100_000),
+    'FLOAT32': (bool, None, None),
+    'MIN_LINSPACE': (float, -1e6, 1e6),
+    'MAX_LINSPACE': (float, -1e6, 1e6),
+    'MIN_X_LIM': (float, -1e6, 1e6),
+    'MAX_X_LIM': (float, -1e6, 1e6),
+    'MIN_Y_LIM': (float, -1e6, 1e6),
+    'MAX_Y_LIM': (float, -1e6, 1e6),
+    'AUX_DIV': (float, 1e-3, 1e6),
+    'RASTER': (bool, None, None),
+}
+
+_defaults = {}  # Constantes originais do lab.py em cada processo do pool
+
+
+class RequestError(Exception):
+    """
+    Requisição inválida (vira resposta 400).
+    """
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    import lab
+    from render import CONSTANTS
+    lab.WORKERS = 1
+    _defaults.update({name: getattr(lab, name) for name in CONSTANTS + EXTRA_CONSTANTS})
+
+
+def _render(job: dict):
+    """
+    Renderiza no processo do pool e retorna os bytes. Cada chamada começa das constantes originais.
+    """
+    import lab
+    for name, value in {**_defaults, **job['constants']}.items():
+        setattr(lab, name, value)
+    return lab.encode_animation(job['chart_opt'], job['opt'], job['animation_type'], job['format'])
+
+
+def check_constants(constants: dict):
+    """
+    Confere tipo e faixa de cada constante e a coerência com as do lab.py (RequestError se inválida).
+    """
+    for name, value in constants.items():
+        kind, low, high = CONSTANT_LIMITS[name]
+        if name == 'DURATION' and value is None:
+            continue
+        if kind is bool:
+            valid = isinstance(value, bool)
+        elif kind is int:
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+        if not valid or (low is not None and not low <= value <= high):
+            raise RequestError(f'{name} inválido: {value!r}' + (f' (de {low} a {high})' if low is not None else ''))
+
+    import lab
+    merged = {name: constants.get(name, getattr(lab, name)) for name in CONSTANT_LIMITS}
+    for low, high in (('MIN_FRAMES', 'MAX_FRAMES'), ('MIN_LINSPACE', 'MAX_LINSPACE'),
+                      ('MIN_X_LIM', 'MAX_X_LIM'), ('MIN_Y_LIM', 'MAX_Y_LIM')):
+        if merged[low] >= merged[high]:
+            raise RequestError(f'{low} deve ser menor que {high}')
+    if merged['FIG_X_SIZE'] * merged['FIG_Y_SIZE'] * merged['DPI'] ** 2 > MAX_PIXELS:
+        raise RequestError(f'Figura com mais de {MAX_PIXELS} pixels')
+    duration = merged['DURATION'] or (merged['MAX_FRAMES'] - merged['MIN_FRAMES']) / merged['FPS']
+    if duration * merged['FPS'] > MAX_REQUEST_FRAMES:
+        raise RequestError(f'Mais de {MAX_REQUEST_FRAMES} frames')
+    if round(duration * merged['FPS']) < 1:
+        raise RequestError('DURATION * FPS não chega a 1 frame')
+
+
+def parse_job(params: dict):
+    """
+    Valida a requisição e retorna o job (gráfico, opt, sinal, formato e constantes).
+    """
+    from batch import CHART_IDS, PARAMS
+    from render import CONSTANTS
+
+    try:
+        chart_opt = CHART_IDS[params.get('chart', 'sen')]
+        animation_type = int(params.get('sign', 1))
+        opt = params.get('opt', [1])
+        opt = [int(p) for p in (opt.split(',') if isinstance(opt, str) else opt)]
+        fmt = params.get('format', 'gif')
+        constants = dict(params.get('constants', {}))
+    except (KeyError, ValueError, TypeError, AttributeError) as e:
+        raise RequestError(f'Parametro inválido: {e}')
+    if not opt or not set(opt) <= set(PARAMS) or fmt not in CONTENT_TYPES or animation_type not in (0, 1):
+        raise RequestError('opt, sign ou format inválido')
+    unknown = set(constants) - set(CONSTANTS + EXTRA_CONSTANTS)
+    if unknown:
+        raise RequestError(f'Constantes desconhecidas: {sorted(unknown)}')
+    check_constants(constants)
+    return {'chart_opt': chart_opt, 'opt': opt, 'animation_type': animation_type, 'format': fmt,
+            'constants': constants}
+
+
+class RenderService:
+    """
+    Fila limitada de renders com agrupamento de requisições iguais e métricas.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = MAX_QUEUE):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=get_context(), initializer=_init_worker)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._in_flight = {}    # chave -> Future do render em andamento
+        self.waiting = 0        # Renders na fila esperando um processo
+        self.running = 0
+        self.counts = {'requests': 0, 'renders': 0, 'coalesced': 0, 'errors': 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def job_key(self, job: dict):
+        from cache import cache_key
+        return cache_key(job['chart_opt'], job['opt'], job['animation_type'],
+                         dict(sorted(job['constants'].items())), job['format'])
+
+    async def render(self, job: dict):
+        """
+        Bytes da animação. Se o mesmo job já está renderizando, espera o mesmo resultado.
+        """
+        start = time.perf_counter()
+        self.counts['requests'] += 1
+        key = self.job_key(job)
+        future = self._in_flight.get(key)
+        if future is None:
+            if self.waiting >= self.max_queue:
+                raise OverflowError('Fila cheia')
+            self.waiting += 1   # Conta na hora (o _run só começa no próximo ciclo do loop)
+            future = asyncio.ensure_future(self._run(job))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.counts['coalesced'] += 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def _run(self, job: dict):
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            self.counts['renders'] += 1
+            return await asyncio.get_running_loop().run_in_executor(self.executor, _render, job)
+        except Exception:
+            self.counts['errors'] += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def stats(self):
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            return 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else None
+
+        return {'queue_depth': self.waiting, 'running': self.running, 'workers': self.workers,
+                'in_flight': len(self._in_flight), **self.counts,
+                'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95), 'p99': percentile(0.99)}}
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def read_request(reader):
+    """
+    Lê uma requisição HTTP/1.1 simples. Retorna (método, caminho, query, corpo).
+    """
+    head = await reader.readuntil(b'\r\n\r\n')
+    if len(head) > MAX_HEADER_BYTES:
+        raise RequestError('Cabeçalho muito grande')
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, _ = lines[0].split(' ', 2)
+    headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise RequestError('Corpo muito grande')
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    return method, url.path, {k: v[-1] for k, v in parse_qs(url.query).items()}, body
+
+
+def response(status: str, body: bytes, content_type: str = 'application/json'):
+    return (f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n').encode() + body
+
+
+def json_response(status: str, data: dict):
+    return response(status, json.dumps(data).encode())
+
+
+async def handle(service: RenderService, reader, writer):
+    try:
+        method, path, query, body = await read_request(reader)
+        if path == '/health':
+            reply = json_response('200 OK', {'ok': True})
+        elif path == '/stats':
+            reply = json_response('200 OK', service.stats())
+        elif path == '/render' and method in ('GET', 'POST'):
+            if method == 'POST':
+                params = json.loads(body or b'{}')
+            else:
+                from render import CONSTANTS
+                constants = {k: json.loads(v) for k, v in query.items() if k in CONSTANTS + EXTRA_CONSTANTS}
+                params = {**{k: v for k, v in query.items() if k not in constants}, 'constants': constants}
+            job = parse_job(params)
+            data = await service.render(job)
+            reply = response('200 OK', data, CONTENT_TYPES[job['format']])
+        else:
+            reply = json_response('404 Not Found', {'error': 'rota desconhecida'})
+    except (RequestError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        reply = json_response('400 Bad Request', {'error': str(e)})
+    except OverflowError as e:
+        reply = json_response('503 Service Unavailable', {'error': str(e)})
+    except Exception as e:
+        reply = json_response('500 Internal Server Error', {'error': str(e)})
+    try:
+        writer.write(reply)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host: str = HOST, port: int = PORT, workers: int = None, max_queue: int = MAX_QUEUE):
+    service = RenderService(workers, max_queue)
+    server = await asyncio.start_server(lambda r, w: handle(service, r, w), host, port, limit=MAX_HEADER_BYTES)
+    print(f'Servindo em http://{host}:{port} ({service.workers} processos)')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serviço HTTP local de renderização das animações.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None, help='processos (padrão: núcleos da CPU)')
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_queue))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
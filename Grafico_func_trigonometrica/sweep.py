@@ -0,0 +1,248 @@
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from engine import NEUTRAL, POLE_FUNCTIONS, decimate_minmax, decimate_x, iter_param_chunks
+from instrument import active
+
+#####################################
+# Varredura de parâmetros
+#
+# Cada um de b_0..b_3 tem sua própria faixa (start -> stop), quantidade de passos e easing,
+# em vez de todos seguirem o mesmo animation_step. As combinações são:
+#   grid=False : as varreduras andam juntas (passo k de cada uma) -> uma animação
+#   grid=True  : produto cartesiano das varreduras (ex: grade (b_1, b_2))
+# Todas as combinações são calculadas com um broadcast só (engine.iter_param_chunks),
+# em blocos que cabem em MAX_TENSOR_BYTES.
+#
+# Saidas: animação (uma combinação por frame) ou imagem com a grade de gráficos pequenos.
+#
+# Uso: python sweep.py sen --b1 0:5:60 --b2 1:3:60:in_out --out varredura.gif
+#      python sweep.py tg --b1 0.5:5:12 --b2 1:3:12 --grid --out grade.png
+#####################################
+
+Sweep = namedtuple('Sweep', 'start stop steps easing', defaults=('linear',))
+
+# t em [0, 1] -> fração do caminho entre start e stop
+EASINGS = {
+    'linear': lambda t: t,
+    'in': lambda t: t * t,
+    'out': lambda t: 1 - (1 - t) ** 2,
+    'in_out': lambda t: t * t * (3 - 2 * t),
+    'cosine': lambda t: (1 - np.cos(np.pi * t)) / 2,
+}
+
+PARAM_NAMES = ('b_0', 'b_1', 'b_2', 'b_3')
+GRID_POINTS = 300       # Pontos de cada gráfico pequeno da grade
+GRID_PAD = 0.08         # Margem (fração da célula) em volta de cada gráfico pequeno
+CELL_SIZE = (1.6, 1.0)  # Tamanho (polegadas) de cada célula da grade
+
+
+def sweep_values(sweep: Sweep):
+    """
+    Valores de uma varredura: steps valores de start até stop seguindo o easing.
+    """
+    t = np.linspace(0, 1, sweep.steps)
+    return sweep.start + (sweep.stop - sweep.start) * EASINGS[sweep.easing](t)
+
+
+def sweep_params(sweeps: dict, grid: bool = False):
+    """
+    Vetores b_0..b_3 (um valor por combinação) e o formato das combinações.
+    sweeps : {indice do parâmetro (0..3): Sweep}. Os outros ficam no valor neutro.
+    """
+    if not sweeps:
+        raise ValueError('Nenhum parâmetro para varrer')
+    keys = sorted(sweeps)
+    values = [sweep_values(sweeps[k]) for k in keys]
+    if grid:
+        shape = tuple(len(v) for v in values)
+        columns = [v.ravel() for v in np.meshgrid(*values, indexing='ij')]
+    else:
+        # Varredura de um passo só (valor fixo) acompanha o tamanho das outras
+        steps = max(len(v) for v in values)
+        values = [np.full(steps, v[0]) if len(v) == 1 else v for v in values]
+        if len({len(v) for v in values}) > 1:
+            raise ValueError('Sem grid todas as varreduras precisam ter o mesmo número de passos (ou 1)')
+        shape = (steps,)
+        columns = values
+    swept = dict(zip(keys, columns))
+    total = int(np.prod(shape))
+    params = tuple(swept[i] if i in swept else np.full(total, NEUTRAL[i]) for i in range(4))
+    return params, shape
+
+
+def param_label(params, index: int, keys):
+    """
+    Texto com os valores dos parâmetros varridos na combinação index, ex: 'b_1=2.50  b_2=1.20'
+    """
+    return '  '.join(f'{PARAM_NAMES[k]}={params[k][index]:.2f}' for k in keys)
+
+
+def break_poles(block, func, x, params):
+    """
+    Para funções com polos (POLE_FUNCTIONS) o primeiro ponto depois de cada polo vira NaN,
+    então a linha não liga os dois lados (sem a linha vertical falsa, qualquer que seja b_1).
+    Os polos vêm da conta: b_2 * x + b_3 muda de ramo entre dois pontos vizinhos.
+    block (F, N) são as linhas das combinações de params (b_0..b_3, um valor por linha).
+    """
+    if func not in POLE_FUNCTIONS:
+        return block
+    period, first_pole, _ = POLE_FUNCTIONS[func]
+    b_2, b_3 = (np.asarray(b, dtype=np.float64)[:, None] for b in params[2:])
+    branch = np.floor((b_2 * x + b_3 - first_pole) / period)
+    block[:, 1:][branch[:, 1:] != branch[:, :-1]] = np.nan
+    return block
+
+
+def save_sweep_animation(chart_opt: int, sweeps: dict, filename: str, grid: bool = False, fps: int = None):
+    """
+    Animação com uma combinação por frame (figura do chart_config, valores no canto).
+    """
+    import matplotlib.pyplot as plt
+    import lab
+    from writers import writer_for
+
+    func = lab.CHARTS[chart_opt][1]
+    params, _ = sweep_params(sweeps, grid)
+    keys = sorted(sweeps)
+    line, fig, x = lab.chart_config()
+    columns = lab.chart_columns(x)
+    x_plot = x if columns is None else decimate_x(x, columns)
+    ax = fig.axes[0]
+    ax.set_title(f"{lab.CHARTS[chart_opt][0]}: varredura de {', '.join(PARAM_NAMES[k] for k in keys)}")
+    text = ax.text(0.01, 0.98, '', transform=ax.transAxes, va='top', animated=True)
+    line.set_animated(True)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+
+    tracer = active()
+    dtype = np.float32 if lab.FLOAT32 else np.float64
+    with writer_for(filename, fps or lab.FPS).opened(filename) as writer:
+        for start, block in iter_param_chunks(func, x, params, dtype=dtype):
+            # Antes da decimação: a coluna de pixel com o polo vira NaN (min/max propagam o NaN)
+            break_poles(block, func, x, [b[start:start + len(block)] for b in params])
+            rows = block if columns is None else decimate_minmax(block, columns)
+            for offset, y in enumerate(rows):
+                index = start + offset
+                t0 = time.perf_counter()
+                fig.canvas.restore_region(background)
+                line.set_data(x_plot, y)
+                text.set_text(param_label(params, index, keys))
+                ax.draw_artist(line)
+                ax.draw_artist(text)
+                t1 = time.perf_counter()
+                before = writer.bytes_written
+                writer.write_rgba(fig.canvas.buffer_rgba())
+                if tracer is not None:
+                    tracer.record('draw', index, t0, t1)
+                    tracer.record('encode', index, t1, time.perf_counter(), writer.bytes_written - before)
+    plt.close(fig)
+
+
+def grid_layout(shape: tuple):
+    """
+    Linhas e colunas da grade: (b_a, b_b) usa o formato da varredura, o resto fica quase quadrado.
+    """
+    if len(shape) == 2:
+        return shape
+    total = int(np.prod(shape))
+    cols = int(np.ceil(np.sqrt(total)))
+    return -(-total // cols), cols
+
+
+def save_sweep_grid(chart_opt: int, sweeps: dict, filename: str, grid: bool = True, points: int = GRID_POINTS):
+    """
+    Imagem com um gráfico pequeno por combinação. Todas as curvas vão em uma LineCollection
+    só (cada uma deslocada para a sua célula), então o desenho não depende de um eixo por gráfico.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    import lab
+
+    func = lab.CHARTS[chart_opt][1]
+    params, shape = sweep_params(sweeps, grid)
+    keys = sorted(sweeps)
+    n_rows, n_cols = grid_layout(shape)
+    x_lim, y_lim = (lab.MIN_X_LIM, lab.MAX_X_LIM), (lab.MIN_Y_LIM, lab.MAX_Y_LIM)
+    x = np.linspace(*x_lim, points)
+    total = len(params[0])
+
+    # Posição de cada combinação na grade e coordenadas das curvas dentro da célula
+    cell = np.arange(total)
+    col, row = cell % n_cols, n_rows - 1 - cell // n_cols
+    scale = 1 - 2 * GRID_PAD
+    u = GRID_PAD + scale * (x - x_lim[0]) / (x_lim[1] - x_lim[0])
+    segments = np.empty((total, points, 2))
+    segments[:, :, 0] = col[:, None] + u
+    for start, block in iter_param_chunks(func, x, params):
+        stop = start + len(block)
+        break_poles(block, func, x, [b[start:stop] for b in params])
+        v = (block - y_lim[0]) / (y_lim[1] - y_lim[0])
+        v[(v < 0) | (v > 1)] = np.nan  # Fora do Y da célula: quebra a linha
+        segments[start:stop, :, 1] = row[start:stop, None] + GRID_PAD + scale * v
+
+    # Eixos x = 0 e y = 0 de cada célula
+    x0 = GRID_PAD + scale * (0 - x_lim[0]) / (x_lim[1] - x_lim[0])
+    y0 = GRID_PAD + scale * (0 - y_lim[0]) / (y_lim[1] - y_lim[0])
+    axes = np.concatenate((
+        np.stack([np.stack((col + GRID_PAD, row + y0), -1), np.stack((col + 1 - GRID_PAD, row + y0), -1)], 1),
+        np.stack([np.stack((col + x0, row + GRID_PAD), -1), np.stack((col + x0, row + 1 - GRID_PAD), -1)], 1),
+    ))
+
+    fig, ax = plt.subplots(figsize=(n_cols * CELL_SIZE[0], n_rows * CELL_SIZE[1] + 0.5), dpi=lab.DPI)
+    ax.add_collection(LineCollection(axes, colors='0.7', linewidths=0.5))
+    ax.add_collection(LineCollection(segments, colors='C0', linewidths=0.8))
+    for index in range(total):
+        ax.text(col[index] + 0.5, row[index] + 1 - GRID_PAD / 2, param_label(params, index, keys),
+                ha='center', va='top', fontsize=5)
+    ax.set_xlim(0, n_cols)
+    ax.set_ylim(0, n_rows)
+    ax.set_axis_off()
+    ax.set_title(f"{lab.CHARTS[chart_opt][0]}: {' x '.join(PARAM_NAMES[k] for k in keys)}")
+    fig.savefig(filename, dpi=lab.DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def parse_sweep(text: str):
+    """
+    Converte 'start:stop:steps[:easing]' em Sweep (ex: '0:5:30:in_out'). Um valor só ('2') fica fixo.
+    """
+    parts = text.split(':')
+    if len(parts) == 1:
+        return Sweep(float(parts[0]), float(parts[0]), 1)
+    if len(parts) not in (3, 4) or (len(parts) == 4 and parts[3] not in EASINGS):
+        raise argparse.ArgumentTypeError(f'Varredura inválida: {text} (use start:stop:steps[:{"|".join(EASINGS)}])')
+    return Sweep(float(parts[0]), float(parts[1]), int(parts[2]), *parts[3:])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Varredura dos parâmetros b_0..b_3.')
+    parser.add_argument('chart', choices=['sen', 'cos', 'tg'])
+    for i in range(4):
+        parser.add_argument(f'--b{i}', type=parse_sweep, metavar='START:STOP:STEPS[:EASING]')
+    parser.add_argument('--grid', action='store_true', help='produto cartesiano das varreduras')
+    parser.add_argument('--out', default='varredura.gif', help='.gif/.mp4/.webm/.apng (animação) ou .png/.svg/.pdf (grade)')
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+    from batch import CHART_IDS
+
+    sweeps = {i: s for i in range(4) if (s := getattr(args, f'b{i}')) is not None}
+    if not sweeps:
+        parser.error('informe ao menos um de --b0, --b1, --b2, --b3')
+    start = time.perf_counter()
+    if args.out.lower().endswith(('.png', '.svg', '.pdf', '.jpg')):
+        save_sweep_grid(CHART_IDS[args.chart], sweeps, args.out, args.grid)
+    else:
+        save_sweep_animation(CHART_IDS[args.chart], sweeps, args.out, args.grid)
+    print(f'{args.out} gerado em {time.perf_counter() - start:.2f}s')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
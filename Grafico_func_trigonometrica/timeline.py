@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+
+from engine import NEUTRAL
+
+#####################################
+# Agenda da animação pelo tempo (em vez do indice do frame)
+#
+# Uma Timeline é uma duração em segundos e uma curva b_i(t) para cada parâmetro variando.
+#   - Exportação: os frames são amostrados exatamente em t = k / fps (k = 0..duração*fps-1),
+#     então nenhum frame é calculado para ser jogado fora.
+#   - Janela ao vivo: realtime_frames escolhe o frame pelo relógio; se o desenho atrasar,
+#     frames são pulados e a animação continua na mesma velocidade do arquivo.
+#     timed_frames faz o mesmo com uma duração por frame (GIF com frames repetidos juntados).
+#
+# frame_timeline reproduz o animation_step = ±frame / FRAME_DIV antigo no fps da exportação.
+#####################################
+
+
+class Timeline:
+    """
+    Duração (s) e curvas {indice do parâmetro (0..3): função t -> valores} da animação.
+    Parâmetros sem curva ficam no valor neutro.
+    """
+
+    def __init__(self, duration: float, curves: dict):
+        self.duration = duration
+        self.curves = curves
+
+    def times(self, fps: float):
+        """
+        Instantes (s) dos frames de um arquivo com fps frames por segundo.
+        Sempre tem pelo menos um frame (t = 0), mesmo com duração menor que 1 / fps.
+        """
+        return np.arange(max(1, int(round(self.duration * fps)))) / fps
+
+    def params(self, times):
+        """
+        Vetores b_0..b_3 nos instantes times.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        return tuple(np.broadcast_to(np.asarray(self.curves[i](times), dtype=np.float64), times.shape).copy()
+                     if i in self.curves else np.full_like(times, NEUTRAL[i]) for i in range(4))
+
+
+def ramp(start: float, rate: float):
+    """
+    Curva linear: start + rate * t (rate em unidades por segundo).
+    """
+    return lambda t: start + rate * t
+
+
+def frame_timeline(opt: list, animation_type: int, min_frames: int, max_frames: int, frame_div: float,
+                   fps: float, duration: float = None):
+    """
+    Timeline equivalente ao animation_step = ±frame / FRAME_DIV exportado a fps: os parâmetros
+    de opt começam em ±min_frames / frame_div e andam ±fps / frame_div por segundo.
+    Sem duration a duração é a dos frames MIN_FRAMES..MAX_FRAMES nesse fps.
+    """
+    sign = 1 if animation_type > 0 else -1
+    if duration is None:
+        duration = (max_frames - min_frames) / fps
+    curve = ramp(sign * min_frames / frame_div, sign * fps / frame_div)
+    return Timeline(duration, {p - 1: curve for p in opt})
+
+
+def realtime_frames(count: int, fps: float, loop: bool = True):
+    """
+    Gera o indice do frame que deve aparecer agora (pelo relógio, não pela contagem de
+    redesenhos). Com loop recomeça do 0 no fim; sem loop para no último frame.
+    """
+    start = time.perf_counter()
+    while True:
+        index = int((time.perf_counter() - start) * fps)
+        if index >= count:
+            if not loop:
+                yield count - 1
+                return
+            start += (index // count) * count / fps
+            index %= count
+        yield index
+
+
+def timed_frames(durations, loop: bool = True):
+    """
+    Como realtime_frames, mas cada frame tem a sua duração em segundos (ex: GIF com frames
+    repetidos juntados num frame mais longo): o indice vem do relógio contra os instantes
+    acumulados de inicio de cada frame.
+    """
+    ends = np.cumsum(durations)
+    total = ends[-1]
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= total:
+            if not loop:
+                yield len(ends) - 1
+                return
+            start += (elapsed // total) * total
+            elapsed %= total
+        yield min(int(np.searchsorted(ends, elapsed, side='right')), len(ends) - 1)
@@ -0,0 +1,285 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.animation import AbstractMovieWriter
+from PIL import GifImagePlugin, Image
+
+from instrument import active
+
+#####################################
+# Writers de animação com memória constante
+#
+# Servem no lugar do PillowWriter no ani.save (são AbstractMovieWriter) e também recebem
+# frames RGBA prontos pelo write_rgba (usado pela exportação paralela do render.py).
+# Nenhum deles guarda os frames: cada frame é escrito assim que chega.
+# O destino pode ser um caminho ou um arquivo aberto/BytesIO (com .name para o formato),
+# ex: buf = BytesIO(); buf.name = 'animation.gif'  -> animação só na memória.
+#
+#   PaletteGifWriter : GIF com paleta global (tirada do primeiro frame), frame a frame.
+#                      Frames iguais ao anterior (mesmo hash) viram um frame só mais longo e
+#                      os outros gravam só o retângulo que mudou (delta).
+#   FFmpegPipeWriter : frames crus (rgba) por pipe para o ffmpeg -> MP4, WebM ou APNG
+#####################################
+
+# Argumentos de saida do ffmpeg para cada formato
+FFMPEG_FORMATS = {
+    'mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'medium', '-crf', '23', '-movflags', '+faststart'],
+    'webm': ['-c:v', 'libvpx-vp9', '-pix_fmt', 'yuv420p', '-b:v', '0', '-crf', '35', '-row-mt', '1'],
+    'apng': ['-c:v', 'apng', '-plays', '0', '-f', 'apng'],
+}
+# Argumentos extras quando a saida é um pipe (mp4 precisa ser fragmentado para não voltar no arquivo)
+FFMPEG_PIPE_ARGS = {
+    'mp4': ['-movflags', 'frag_keyframe+empty_moov', '-f', 'mp4'],
+    'webm': ['-f', 'webm'],
+    'apng': [],
+}
+
+
+def is_file(outfile):
+    """
+    True se outfile é um arquivo aberto / BytesIO em vez de um caminho.
+    """
+    return hasattr(outfile, 'write')
+
+
+def output_format(outfile):
+    """
+    Formato pela extensão do caminho (ou do .name de um arquivo aberto/BytesIO).
+    """
+    name = getattr(outfile, 'name', '') if is_file(outfile) else outfile
+    fmt = os.path.splitext(str(name))[1].lstrip('.').lower()
+    if not fmt:
+        raise ValueError(f'Sem formato de saida para {outfile!r} (use um nome com extensão)')
+    return fmt
+
+
+class RGBAWriter(AbstractMovieWriter):
+    """
+    Base dos writers: o grab_frame do ani.save desenha a figura em RGBA e chama write_rgba.
+    Fora do ani.save use open(outfile), write_rgba(frame) e close() (ou with writer.opened(outfile)).
+    """
+
+    bytes_written = 0   # Bytes já escritos no arquivo/pipe (usado pela instrumentação)
+    frames_written = 0
+
+    def setup(self, fig, outfile, dpi=None):
+        if is_file(outfile):
+            # A checagem do caminho do AbstractMovieWriter não vale para BytesIO
+            self.outfile, self.fig, self.dpi = outfile, fig, fig.dpi if dpi is None else dpi
+        else:
+            super().setup(fig, outfile, dpi=dpi)
+        self.open(outfile)
+
+    def grab_frame(self, **savefig_kwargs):
+        tracer = active()
+        start = time.perf_counter()
+        buf = BytesIO()
+        self.fig.savefig(buf, **{**savefig_kwargs, 'format': 'rgba', 'dpi': self.dpi})
+        width, height = self.frame_size
+        frame = np.frombuffer(buf.getbuffer(), dtype=np.uint8).reshape(height, width, 4)
+        if tracer is None:
+            return self.write_rgba(frame)
+        drawn = time.perf_counter()
+        index, before = self.frames_written, self.bytes_written
+        self.write_rgba(frame)
+        tracer.record('draw', index, start, drawn)
+        tracer.record('encode', index, drawn, time.perf_counter(), self.bytes_written - before)
+
+    def finish(self):
+        self.close()
+
+    @contextmanager
+    def opened(self, outfile):
+        """
+        Context manager para escrever frames RGBA sem figura.
+        """
+        self.open(outfile)
+        try:
+            yield self
+        finally:
+            self.close()
+
+    def open(self, outfile):
+        raise NotImplementedError
+
+    def write_rgba(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class PaletteGifWriter(RGBAWriter):
+    """
+    GIF com uma paleta global calculada no primeiro frame. Cada frame é quantizado nessa
+    paleta e escrito direto no arquivo, então a memória não cresce com MAX_FRAMES.
+
+    Com delta (padrão):
+      - o hash (blake2b) dos pixels RGBA é comparado com o do frame anterior; se for igual o
+        frame nem é quantizado, só aumenta a duração do frame anterior;
+      - senão só o retângulo onde os pixels (já na paleta) mudaram é gravado, no offset dele
+        (o GIF mantém o resto do frame anterior na tela).
+    Por isso cada frame fica pendente até o próximo chegar (a duração vai no cabeçalho dele).
+    """
+
+    def __init__(self, fps=20, colors=256, delta=True, **kwargs):
+        super().__init__(fps=fps, **kwargs)
+        self.colors = colors
+        self.delta = delta
+
+    @classmethod
+    def isAvailable(cls):
+        return True
+
+    def open(self, outfile):
+        self.outfile = outfile
+        self._file = outfile if is_file(outfile) else open(outfile, 'wb')
+        self._palette = None
+        self._hash = None       # Hash do último frame recebido
+        self._indexed = None    # Último frame na paleta (uint8), para achar o retângulo que mudou
+        self._pending = None    # (imagem, offset, duração em ms) esperando o próximo frame
+        self.bytes_written = self.frames_written = 0
+        self.frames_merged = 0  # Frames iguais ao anterior (viraram duração)
+
+    def write_rgba(self, frame):
+        frame = np.ascontiguousarray(frame)
+        duration = 1000 / self.fps
+        self.frames_written += 1
+        if self.delta:
+            digest = hashlib.blake2b(frame.data, digest_size=16).digest()
+            if digest == self._hash:
+                image, offset, pending = self._pending
+                self._pending = image, offset, pending + duration
+                self.frames_merged += 1
+                return
+            self._hash = digest
+
+        image = Image.fromarray(frame, 'RGBA').convert('RGB')
+        if self._palette is None:
+            self._palette = image.quantize(self.colors, method=Image.Quantize.MEDIANCUT)
+            header, _ = GifImagePlugin.getheader(self._palette.copy(), info={'loop': 0})
+            self.bytes_written += self._file.write(b''.join(header))
+        indexed = image.quantize(palette=self._palette, dither=Image.Dither.NONE)
+        offset = (0, 0)
+        if self.delta:
+            pixels = np.asarray(indexed)
+            if self._indexed is not None:
+                changed = pixels != self._indexed
+                rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+                if not len(rows):
+                    # Pixels diferentes que caem na mesma cor da paleta: também é duplicado
+                    image, offset, pending = self._pending
+                    self._pending = image, offset, pending + duration
+                    self.frames_merged += 1
+                    return
+                box = (cols[0], rows[0], cols[-1] + 1, rows[-1] + 1)
+                indexed, offset = indexed.crop(box), box[:2]
+            self._indexed = pixels
+        self._flush()
+        self._pending = indexed, offset, duration
+
+    def _flush(self):
+        """
+        Grava o frame pendente (com a duração acumulada).
+        """
+        if self._pending is None:
+            return
+        image, offset, duration = self._pending
+        for chunk in GifImagePlugin.getdata(image, offset=offset, duration=int(round(duration))):
+            self.bytes_written += self._file.write(chunk)
+        self._pending = None
+
+    def close(self):
+        if self._palette is None:
+            # Sem nenhum frame não há cabeçalho: só o ';' seria um GIF inválido
+            if not is_file(self.outfile):
+                self._file.close()
+            raise ValueError('GIF sem frames')
+        self._flush()
+        self._file.write(b';')  # Fim do GIF
+        if not is_file(self.outfile):
+            self._file.close()
+
+
+class FFmpegPipeWriter(RGBAWriter):
+    """
+    Envia os frames crus (rgba) para um processo ffmpeg local pelo stdin.
+    O formato (mp4, webm ou apng) vem da extensão do arquivo ou do parametro fmt.
+    """
+
+    def __init__(self, fps=20, fmt=None, **kwargs):
+        super().__init__(fps=fps, **kwargs)
+        self.fmt = fmt
+
+    @classmethod
+    def isAvailable(cls):
+        from shutil import which
+        return which(rcParams['animation.ffmpeg_path']) is not None
+
+    def open(self, outfile):
+        self.outfile = outfile
+        self._proc = None
+        self._reader = None
+        self.bytes_written = self.frames_written = 0
+
+    def _start(self, width: int, height: int):
+        fmt = self.fmt or output_format(self.outfile)
+        cmd = [rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', *FFMPEG_FORMATS[fmt]]
+        if not is_file(self.outfile):
+            self._proc = subprocess.Popen(cmd + [self.outfile], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            return
+        # Saida na memória: o ffmpeg escreve no stdout e uma thread copia para o arquivo/BytesIO
+        self._proc = subprocess.Popen(cmd + FFMPEG_PIPE_ARGS[fmt] + ['pipe:1'], stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._reader = threading.Thread(target=shutil.copyfileobj, args=(self._proc.stdout, self.outfile))
+        self._reader.start()
+
+    def write_rgba(self, frame):
+        frame = np.ascontiguousarray(frame)
+        if self._proc is None:
+            self._start(frame.shape[1], frame.shape[0])
+        try:
+            self.bytes_written += self._proc.stdin.write(frame.data)
+        except BrokenPipeError:
+            # O ffmpeg parou de ler: o close mostra o erro dele; se ele saiu com 0 os frames
+            # seguintes abririam outro ffmpeg e sobrescreveriam a saida
+            self.close()
+            raise RuntimeError('ffmpeg fechou a entrada antes do fim dos frames')
+        self.frames_written += 1
+
+    def close(self):
+        if self._proc is None:
+            return
+        if self._reader is None:
+            _, err = self._proc.communicate()
+        else:
+            self._proc.stdin.close()
+            self._reader.join()
+            err = self._proc.stderr.read()
+            self._proc.wait()
+        proc, self._proc = self._proc, None
+        if proc.returncode:
+            raise RuntimeError(f'ffmpeg terminou com erro {proc.returncode}: {err.decode(errors="replace")}')
+
+
+def writer_for(filename, fps: int = 20):
+    """
+    Escolhe o writer pela extensão do arquivo (.gif, .mp4, .webm ou .apng).
+    filename pode ser um BytesIO com .name (ex: 'animation.gif').
+    """
+    ext = output_format(filename)
+    if ext == 'gif':
+        return PaletteGifWriter(fps=fps)
+    if ext in FFMPEG_FORMATS:
+        return FFmpegPipeWriter(fps=fps, fmt=ext)
+    raise ValueError(f'Formato de saida não suportado: {filename}')